@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.main import app, store  # noqa: E402
+
+USERS = 300
+
+
+def operations():
+    ops = []
+    for i in range(USERS):
+        ops.append(
+            {
+                "op": "create",
+                "user": {
+                    "username": f"user{i}",
+                    "email": f"user{i}@example.com",
+                    "password": "securepassword123",
+                },
+            }
+        )
+    for i in range(USERS):
+        ops.append(
+            {
+                "op": "update",
+                "user_id": i + 1,
+                "user": {"username": f"renamed{i}", "email": f"renamed{i}@example.com"},
+            }
+        )
+    for i in range(0, USERS, 2):
+        ops.append({"op": "delete", "user_id": i + 1})
+    return ops
+
+
+async def individual(client: httpx.AsyncClient, ops) -> None:
+    for op in ops:
+        if op["op"] == "create":
+            response = await client.post("/users", json=op["user"])
+        elif op["op"] == "update":
+            response = await client.put(f"/users/{op['user_id']}", json=op["user"])
+        else:
+            response = await client.delete(f"/users/{op['user_id']}")
+        assert response.status_code < 400, response.text
+
+
+async def batched(client: httpx.AsyncClient, ops) -> None:
+    response = await client.post("/users/batch", json={"operations": ops})
+    assert response.status_code == 200, response.text
+
+
+async def measure(label: str, runner, ops) -> float:
+    await store.clear()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        await runner(client, ops)
+        elapsed = time.perf_counter() - started
+    print(f"{label:<22} {len(ops) / elapsed:10.0f} opérations/s ({elapsed:.3f} s)")
+    return elapsed
+
+
+async def main():
+    ops = operations()
+    print(f"{len(ops)} opérations (créations, mises à jour, suppressions)\n")
+    single = await measure("appels individuels", individual, ops)
+    batch = await measure("POST /users/batch", batched, ops)
+    print(f"\nGain : x{single / batch:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
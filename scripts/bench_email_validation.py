@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import random
+import sys
+import timeit
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel, EmailStr, Field
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models import UserBase, UserCreate  # noqa: E402
+
+DOMAINS = ["gmail.com", "yahoo.fr", "outlook.com", "example.com", "company.io"]
+ITERATIONS = 20_000
+
+
+class LegacyUserBase(BaseModel):
+    username: str = Field(..., min_length=3, max_length=50)
+    email: EmailStr
+    full_name: Optional[str] = None
+
+
+class LegacyUserCreate(LegacyUserBase):
+    password: str = Field(..., min_length=8)
+
+
+def payloads(count: int):
+    rng = random.Random(42)
+    return [
+        {
+            "username": f"user{i}",
+            "email": f"user{i}@{rng.choice(DOMAINS)}",
+            "full_name": f"User {i}",
+            "password": "securepassword123",
+        }
+        for i in range(count)
+    ]
+
+
+def bench(label: str, model, data) -> float:
+    elapsed = timeit.timeit(
+        lambda: [model.model_validate(item) for item in data], number=1
+    )
+    per_request = elapsed / len(data) * 1_000_000
+    print(f"{label:<32} {per_request:8.2f} µs/requête")
+    return per_request
+
+
+def main():
+    data = payloads(ITERATIONS)
+    update_data = [{k: v for k, v in d.items() if k != "password"} for d in data]
+
+    print(f"Validation de {ITERATIONS} payloads ({len(DOMAINS)} domaines)\n")
+    before_create = bench("create_user avant (EmailStr)", LegacyUserCreate, data)
+    after_create = bench("create_user après (cache)", UserCreate, data)
+    before_update = bench("update_user avant (EmailStr)", LegacyUserBase, update_data)
+    after_update = bench("update_user après (cache)", UserBase, update_data)
+
+    print()
+    print(f"Gain create_user : x{before_create / after_create:.1f}")
+    print(f"Gain update_user : x{before_update / after_update:.1f}")
+
+
+if __name__ == "__main__":
+    main()
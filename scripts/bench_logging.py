@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.access_log import JsonFormatter, configure_logging  # noqa: E402
+
+RECORDS = 100_000
+EXTRA = {
+    "request_id": "0123456789abcdef0123456789abcdef",
+    "method": "GET",
+    "route": "/users/{user_id}",
+    "path": "/users/42",
+    "status": 200,
+    "latency_ms": 1.234,
+    "user_id": "42",
+}
+
+
+def emit(logger: logging.Logger) -> float:
+    started = time.perf_counter()
+    for _ in range(RECORDS):
+        logger.info("GET /users/42 200", extra=EXTRA)
+    return time.perf_counter() - started
+
+
+def bench_sync(path: Path) -> float:
+    handler = logging.FileHandler(path)
+    handler.setFormatter(JsonFormatter())
+    logger = logging.getLogger("bench.sync")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    elapsed = emit(logger)
+    handler.close()
+    return elapsed
+
+
+def bench_queue(path: Path) -> float:
+    with open(path, "w") as stream:
+        handler, listener = configure_logging(queue_size=RECORDS + 1, stream=stream)
+        listener.start()
+        elapsed = emit(logging.getLogger("src.access"))
+        listener.stop()
+    return elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_elapsed = bench_sync(Path(tmp) / "sync.log")
+        queue_elapsed = bench_queue(Path(tmp) / "queue.log")
+
+    print(f"{RECORDS} enregistrements d'accès JSON\n")
+    for label, elapsed in (
+        ("synchrone (FileHandler)", sync_elapsed),
+        ("QueueHandler + thread", queue_elapsed),
+    ):
+        print(
+            f"{label:<26} {RECORDS / elapsed:10.0f} logs/s "
+            f"{elapsed / RECORDS * 1_000_000:6.2f} µs/log côté requête"
+        )
+
+
+if __name__ == "__main__":
+    main()
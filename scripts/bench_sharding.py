@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.models import UserBase  # noqa: E402
+from src.sharding import RemoteShard, create_store  # noqa: E402
+
+WRITERS = 4
+WRITES_PER_WRITER = 2000
+SHARD_COUNTS = (1, 2, 4)
+
+
+async def write_users(sockets, writer: int) -> int:
+    store = create_store(sockets=sockets)
+    for i in range(WRITES_PER_WRITER):
+        name = f"w{writer}u{i}"
+        await store.add(UserBase(username=name, email=f"{name}@example.com"))
+    return WRITES_PER_WRITER
+
+
+def write(args):
+    return asyncio.run(write_users(*args))
+
+
+def start_shards(directory: str, count: int):
+    sockets = [os.path.join(directory, f"shard-{i}.sock") for i in range(count)]
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "src.shard_server",
+                "--socket",
+                path,
+                "--index",
+                str(i),
+                "--count",
+                str(count),
+            ],
+            cwd=ROOT,
+        )
+        for i, path in enumerate(sockets)
+    ]
+    deadline = time.monotonic() + 10
+    while not all(asyncio.run(RemoteShard(path).ping()) for path in sockets):
+        if time.monotonic() > deadline:
+            raise RuntimeError("Les shards n'ont pas démarré")
+        time.sleep(0.05)
+    return sockets, processes
+
+
+def measure(count: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        sockets, processes = start_shards(directory, count)
+        try:
+            with Pool(WRITERS) as pool:
+                started = time.perf_counter()
+                total = sum(pool.map(write, [(sockets, w) for w in range(WRITERS)]))
+                elapsed = time.perf_counter() - started
+            stored = asyncio.run(create_store(sockets=sockets).count())
+            assert stored == total, (stored, total)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+    rate = total / elapsed
+    print(f"{count} shard(s) {rate:10.0f} écritures/s ({elapsed:.3f} s)")
+    return rate
+
+
+def main():
+    print(
+        f"{WRITERS} processus écrivains x {WRITES_PER_WRITER} créations, "
+        f"{os.cpu_count()} CPU disponible(s)\n"
+    )
+    rates = [measure(count) for count in SHARD_COUNTS]
+    print(f"\nGain {SHARD_COUNTS[-1]} shards / 1 shard : x{rates[-1] / rates[0]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
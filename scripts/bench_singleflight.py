@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.singleflight import SingleFlight  # noqa: E402
+
+BACKEND_LATENCY = 0.005
+HOT_KEYS = 5
+CONCURRENCY = 2_000
+DURATION = 2.0
+
+
+class SlowBackend:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_user(self, user_id: int) -> bytes:
+        self.calls += 1
+        await asyncio.sleep(BACKEND_LATENCY)
+        return f'{{"id": {user_id}}}'.encode()
+
+
+async def storm(use_singleflight: bool):
+    backend = SlowBackend()
+    flight = SingleFlight()
+    served = 0
+    deadline = time.perf_counter() + DURATION
+
+    async def client(n: int):
+        nonlocal served
+        user_id = n % HOT_KEYS
+        while time.perf_counter() < deadline:
+            if use_singleflight:
+                await flight.do(user_id, lambda: backend.get_user(user_id))
+            else:
+                await backend.get_user(user_id)
+            served += 1
+
+    await asyncio.gather(*[client(n) for n in range(CONCURRENCY)])
+    return served / DURATION, backend.calls / DURATION, flight.stats()
+
+
+def main():
+    print(
+        f"{CONCURRENCY} clients, {HOT_KEYS} clés chaudes, "
+        f"latence backend {BACKEND_LATENCY * 1000:.0f} ms, {DURATION:.0f} s\n"
+    )
+    for label, enabled in (("sans single-flight", False), ("avec single-flight", True)):
+        served, backend_calls, stats = asyncio.run(storm(enabled))
+        print(
+            f"{label:<20} {served:10.0f} req/s servies "
+            f"{backend_calls:10.0f} appels backend/s"
+        )
+        if enabled:
+            print(f"{'':<20} ratio de coalescence : {stats['coalescing_ratio']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
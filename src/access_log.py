@@ -0,0 +1,186 @@
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ACCESS_LOGGER = "src.access"
+REQUEST_ID_HEADER = b"x-request-id"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RouteSamplingFilter(logging.Filter):
+    def __init__(self, routes: Tuple[str, ...], rates: Dict[int, float]):
+        super().__init__()
+        self.routes = routes
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        if rate is None or getattr(record, "route", None) not in self.routes:
+            return True
+        return rate > 0 and random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not hasattr(record, "request_id"):
+            request_id = request_id_var.get()
+            if request_id is not None:
+                record.request_id = request_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(value: str) -> Dict[int, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        level, _, rate = item.partition("=")
+        rates[logging.getLevelName(level.strip().upper())] = float(rate)
+    return rates
+
+
+def configure_logging(
+    level: str = "info",
+    fmt: str = "json",
+    queue_size: int = 10_000,
+    sampled_routes: Tuple[str, ...] = (),
+    sample_rates: Optional[Dict[int, float]] = None,
+    stream=None,
+) -> Tuple[NonBlockingQueueHandler, QueueListener]:
+    output = logging.StreamHandler(stream or sys.stdout)
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+        )
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    if sampled_routes and sample_rates:
+        handler.addFilter(RouteSamplingFilter(sampled_routes, sample_rates))
+    listener = QueueListener(handler.queue, output, respect_handler_level=False)
+
+    logger = logging.getLogger("src")
+    logger.handlers = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+    return handler, listener
+
+
+class AccessLogMiddleware:
+    def __init__(self, app: ASGIApp, logger_name: str = ACCESS_LOGGER):
+        self.app = app
+        self.logger = logging.getLogger(logger_name)
+        self._routes: Dict[object, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        incoming = dict(scope["headers"]).get(REQUEST_ID_HEADER)
+        request_id = incoming.decode("latin-1") if incoming else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
+            self._log(scope, request_id, status_code, started)
+
+    def _log(self, scope: Scope, request_id: str, status_code: int, started: float):
+        if status_code >= 500:
+            level = logging.ERROR
+        elif status_code >= 400:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        if not self.logger.isEnabledFor(level):
+            return
+
+        route = self._route_template(scope)
+        extra = {
+            "request_id": request_id,
+            "method": scope["method"],
+            "route": route,
+            "path": scope["path"],
+            "status": status_code,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        user_id = scope.get("path_params", {}).get("user_id")
+        if user_id is not None:
+            extra["user_id"] = user_id
+        self.logger.log(
+            level,
+            "%s %s %s",
+            scope["method"],
+            scope["path"],
+            status_code,
+            extra=extra,
+        )
+
+    def _route_template(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return scope["path"]
+        if endpoint not in self._routes:
+            for route in getattr(scope.get("app"), "routes", []):
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._routes[endpoint] = route.path
+                    break
+            else:
+                self._routes[endpoint] = scope["path"]
+        return self._routes[endpoint]
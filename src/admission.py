@@ -0,0 +1,113 @@
+import asyncio
+import inspect
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+Check = Callable[[], Union[bool, Awaitable[bool]]]
+
+
+class LoadMonitor:
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_loop_lag_ms: float,
+        interval_ms: float = 100.0,
+        window: int = 10,
+        check_timeout: float = 1.0,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.interval = interval_ms / 1000
+        self.check_timeout = check_timeout
+        self.in_flight = 0
+        self.loop_lag_ms = 0.0
+        self.shed_total = 0
+        self._lag_samples: deque = deque(maxlen=window)
+        self.checks: Dict[str, Check] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add_check(self, name: str, check: Check) -> None:
+        self.checks[name] = check
+
+    async def run_checks(self) -> Dict[str, bool]:
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                result = check()
+                if inspect.isawaitable(result):
+                    result = await asyncio.wait_for(result, self.check_timeout)
+                results[name] = bool(result)
+            except Exception:
+                results[name] = False
+        return results
+
+    def overload_reason(self) -> Optional[str]:
+        if self.in_flight >= self.max_in_flight:
+            return f"in-flight requests {self.in_flight} >= {self.max_in_flight}"
+        if self.loop_lag_ms > self.max_loop_lag_ms:
+            return (
+                f"event loop lag {self.loop_lag_ms:.1f}ms "
+                f"> {self.max_loop_lag_ms:.1f}ms"
+            )
+        return None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._lag_samples.clear()
+        self.loop_lag_ms = 0.0
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            self._lag_samples.append(max(lag, 0.0) * 1000)
+            self.loop_lag_ms = max(self._lag_samples)
+
+
+class AdmissionControlMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        monitor: LoadMonitor,
+        exempt_prefixes: Tuple[str, ...] = ("/health",),
+    ):
+        self.app = app
+        self.monitor = monitor
+        self.exempt_prefixes = exempt_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.monitor.overload_reason()
+        if reason is not None:
+            self.monitor.shed_total += 1
+            response = JSONResponse(
+                {"detail": f"Service overloaded: {reason}"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.monitor.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.in_flight -= 1
@@ -0,0 +1,240 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from src.emails import canonical_email
+from src.models import BatchOperation, BatchOperationResult, User
+from src.sharding import DuplicateUserError, ShardedUserStore
+
+StagedUsers = Dict[int, Optional[User]]
+
+
+class BatchPlan:
+    def __init__(
+        self,
+        store: ShardedUserStore,
+        operations: Sequence[BatchOperation],
+        ids: Dict[int, int],
+        atomic: bool = False,
+    ):
+        self.store = store
+        self.operations = operations
+        self.ids = ids
+        self.atomic = atomic
+        self.staged: StagedUsers = {}
+        self.created: Dict[int, int] = {}
+        self.writers: Dict[int, List[int]] = {}
+        self.results: List[BatchOperationResult] = []
+
+    @property
+    def ok(self) -> bool:
+        return all(result.status < 400 for result in self.results)
+
+    @classmethod
+    async def build(
+        cls,
+        store: ShardedUserStore,
+        operations: Sequence[BatchOperation],
+        atomic: bool,
+    ) -> "BatchPlan":
+        allocator = await store.id_allocator()
+        ids = {
+            index: allocator.allocate(operation.user.username)
+            for index, operation in enumerate(operations)
+            if operation.op == "create"
+        }
+        rejected: Dict[int, str] = {}
+        while True:
+            plan = cls(store, operations, ids, atomic)
+            await plan._stage(rejected)
+            conflicts = await plan._find_conflicts()
+            if not conflicts:
+                return plan
+            if atomic:
+                for index, detail in conflicts.items():
+                    plan.results[index] = _failure(plan.results[index], 400, detail)
+                return plan
+            rejected.update(conflicts)
+
+    def abort(self) -> None:
+        self.results = [
+            result
+            if result.status >= 400
+            else _failure(result, 424, "Not applied: atomic batch aborted")
+            for result in self.results
+        ]
+
+    async def commit(self) -> bool:
+        assigned: Dict[int, int] = {}
+        try:
+            async with self.store.transaction():
+                previous = await self._release_previous()
+                for user_id, user in self.staged.items():
+                    try:
+                        created = await self._apply(user_id, user)
+                    except _Rejected as e:
+                        if self.atomic:
+                            raise
+                        if user_id in previous:
+                            await self._reclaim(previous[user_id])
+                        self._fail(e.user_id, e.status, e.detail)
+                    else:
+                        if created is not None:
+                            assigned[user_id] = created
+        except _Rejected as e:
+            self._fail(e.user_id, e.status, e.detail)
+            self.abort()
+            return False
+
+        for result in self.results:
+            if result.user is not None and result.user.id in assigned:
+                result.user.id = assigned[result.user.id]
+        return True
+
+    async def _release_previous(self) -> Dict[int, User]:
+        previous: Dict[int, User] = {}
+        for user_id in self.staged:
+            current = None if user_id in self.created else await self.store.get(user_id)
+            if current is not None:
+                previous[user_id] = current.model_copy()
+                await self.store.unclaim(current)
+        return previous
+
+    async def _apply(self, user_id: int, user: Optional[User]) -> Optional[int]:
+        try:
+            if user_id in self.created:
+                data = user or self.results[self.created[user_id]].user
+                created = await self.store.add(data)
+                if user is None:
+                    await self.store.delete(created.id)
+                return created.id
+            if user is None:
+                found = await self.store.delete(user_id)
+            else:
+                found = await self.store.update(user_id, user) is not None
+        except DuplicateUserError as e:
+            raise _Rejected(user_id, 400, str(e)) from e
+        if not found:
+            raise _Rejected(user_id, 404, f"User with id {user_id} not found")
+        return None
+
+    async def _reclaim(self, user: User) -> None:
+        try:
+            await self.store.claim(user.id, user)
+        except DuplicateUserError:
+            pass
+
+    def _fail(self, user_id: int, status: int, detail: str) -> None:
+        for index in self.writers[user_id]:
+            self.results[index] = _failure(self.results[index], status, detail)
+
+    async def _stage(self, rejected: Dict[int, str]) -> None:
+        now = datetime.now()
+
+        for index, operation in enumerate(self.operations):
+            result = BatchOperationResult(index=index, op=operation.op, status=200)
+            self.results.append(result)
+
+            if index in rejected:
+                result.status, result.detail = 400, rejected[index]
+                continue
+
+            if operation.op == "create":
+                user = User(
+                    id=self.ids[index],
+                    username=operation.user.username,
+                    email=operation.user.email,
+                    full_name=operation.user.full_name,
+                    is_active=True,
+                    created_at=now,
+                )
+                self.staged[user.id] = user
+                self.created[user.id] = index
+                self.writers[user.id] = [index]
+                result.status, result.user = 201, user.model_copy()
+                continue
+
+            current = await self._current(operation.user_id)
+            if current is None:
+                result.status = 404
+                result.detail = f"User with id {operation.user_id} not found"
+                continue
+
+            self.writers.setdefault(operation.user_id, []).append(index)
+            if operation.op == "update":
+                user = current.model_copy(
+                    update={
+                        "username": operation.user.username,
+                        "email": operation.user.email,
+                        "full_name": operation.user.full_name,
+                    }
+                )
+                self.staged[user.id] = user
+                result.user = user.model_copy()
+            else:
+                self.staged[operation.user_id] = None
+                result.status = 204
+
+    async def _current(self, user_id: int) -> Optional[User]:
+        if user_id in self.staged:
+            return self.staged[user_id]
+        return await self.store.get(user_id)
+
+    async def _find_conflicts(self) -> Dict[int, str]:
+        last_writer = {
+            user_id: indices[-1] for user_id, indices in self.writers.items()
+        }
+        conflicts: Dict[int, str] = {}
+        staged = [
+            (user_id, user) for user_id, user in self.staged.items() if user is not None
+        ]
+
+        for label, value_of, key_of, owner_of in (
+            (
+                "Username",
+                lambda user: user.username,
+                lambda user: user.username,
+                self.store.username_owner,
+            ),
+            (
+                "Email",
+                lambda user: user.email,
+                lambda user: canonical_email(user.email),
+                self.store.email_owner,
+            ),
+        ):
+            owners = {
+                user_id: await owner_of(value_of(user)) for user_id, user in staged
+            }
+            claimed: Dict[str, int] = {}
+            ordered = sorted(
+                staged,
+                key=lambda item: (owners[item[0]] != item[0], last_writer[item[0]]),
+            )
+            for user_id, user in ordered:
+                key, owner = key_of(user), owners[user_id]
+                if key in claimed or (
+                    owner is not None and owner != user_id and owner not in self.staged
+                ):
+                    conflicts.setdefault(
+                        last_writer[user_id],
+                        f"{label} '{value_of(user)}' already exists",
+                    )
+                else:
+                    claimed[key] = user_id
+        return conflicts
+
+
+def _failure(
+    result: BatchOperationResult, status: int, detail: str
+) -> BatchOperationResult:
+    return BatchOperationResult(
+        index=result.index, op=result.op, status=status, detail=detail
+    )
+
+
+class _Rejected(Exception):
+    def __init__(self, user_id: int, status: int, detail: str):
+        super().__init__(detail)
+        self.user_id = user_id
+        self.status = status
+        self.detail = detail
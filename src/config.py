@@ -0,0 +1,72 @@
+import os
+from dataclasses import dataclass
+from typing import Tuple
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def _env_list(name: str, default: str) -> Tuple[str, ...]:
+    items = (item.strip() for item in os.getenv(name, default).split(","))
+    return tuple(item for item in items if item)
+
+
+@dataclass(frozen=True)
+class Settings:
+    max_in_flight: int
+    max_loop_lag_ms: float
+    loop_lag_interval_ms: float
+    profiling_sample_rate: float
+    profiling_slow_ms: float
+    profiling_cprofile: bool
+    profiling_buffer_size: int
+    email_domain_cache_size: int
+    idempotency_backend: str
+    idempotency_ttl_seconds: float
+    idempotency_max_entries: int
+    redis_url: str
+    log_level: str
+    log_format: str
+    log_queue_size: int
+    log_sampled_routes: Tuple[str, ...]
+    log_sample_rates: str
+    shard_count: int
+    shard_sockets: Tuple[str, ...]
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            max_in_flight=_env_int("MAX_IN_FLIGHT", 256),
+            max_loop_lag_ms=_env_float("MAX_LOOP_LAG_MS", 200.0),
+            loop_lag_interval_ms=_env_float("LOOP_LAG_INTERVAL_MS", 100.0),
+            profiling_sample_rate=_env_float("PROFILING_SAMPLE_RATE", 0.0),
+            profiling_slow_ms=_env_float("PROFILING_SLOW_MS", 0.0),
+            profiling_cprofile=_env_bool("PROFILING_CPROFILE", False),
+            profiling_buffer_size=_env_int("PROFILING_BUFFER_SIZE", 100),
+            email_domain_cache_size=_env_int("EMAIL_DOMAIN_CACHE_SIZE", 1024),
+            idempotency_backend=os.getenv("IDEMPOTENCY_BACKEND", "memory"),
+            idempotency_ttl_seconds=_env_float("IDEMPOTENCY_TTL_SECONDS", 3600.0),
+            idempotency_max_entries=_env_int("IDEMPOTENCY_MAX_ENTRIES", 10_000),
+            redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            log_level=os.getenv("LOG_LEVEL", "info"),
+            log_format=os.getenv("LOG_FORMAT", "json"),
+            log_queue_size=_env_int("LOG_QUEUE_SIZE", 10_000),
+            log_sampled_routes=_env_list(
+                "LOG_SAMPLED_ROUTES", "/health,/health/live,/health/ready"
+            ),
+            log_sample_rates=os.getenv("LOG_SAMPLE_RATES", "INFO=0.01"),
+            shard_count=_env_int("SHARD_COUNT", 1),
+            shard_sockets=_env_list("SHARD_SOCKETS", ""),
+        )
+
+
+settings = Settings.from_env()
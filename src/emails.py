@@ -0,0 +1,67 @@
+import re
+from functools import lru_cache
+from typing import Any
+
+import email_validator
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic.networks import validate_email
+from pydantic_core import PydanticCustomError, core_schema
+
+from src.config import settings
+
+MAX_FAST_PATH_LENGTH = 254
+MAX_LOCAL_PART_LENGTH = 64
+
+_ATEXT = r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+"
+_SIMPLE_EMAIL = re.compile(rf"({_ATEXT}(?:\.{_ATEXT})*)@([^@\s]+)")
+
+
+def _validate_domain(domain: str) -> str:
+    try:
+        parts = email_validator.validate_email(
+            f"x@{domain}", check_deliverability=False
+        )
+    except email_validator.EmailNotValidError as e:
+        raise PydanticCustomError(
+            "value_error",
+            "value is not a valid email address: {reason}",
+            {"reason": str(e.args[0])},
+        ) from e
+    return parts.domain
+
+
+validate_domain = lru_cache(maxsize=settings.email_domain_cache_size)(_validate_domain)
+
+
+def normalize_email(value: str) -> str:
+    match = _SIMPLE_EMAIL.fullmatch(value)
+    if (
+        match is None
+        or len(value) > MAX_FAST_PATH_LENGTH
+        or len(match.group(1)) > MAX_LOCAL_PART_LENGTH
+    ):
+        return validate_email(value)[1]
+    return f"{match.group(1)}@{validate_domain(match.group(2))}"
+
+
+def canonical_email(email: str) -> str:
+    return email.casefold()
+
+
+class CachedEmailStr(str):
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, _source: Any, _handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        return core_schema.no_info_after_validator_function(
+            normalize_email, core_schema.str_schema()
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(
+        cls, schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler
+    ) -> JsonSchemaValue:
+        field_schema = handler(schema)
+        field_schema.update(type="string", format="email")
+        return field_schema
@@ -0,0 +1,313 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+MAX_KEY_LENGTH = 255
+LOCAL_LOCK = "local"
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class StoredResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    fingerprint: str
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "status": self.status,
+                "headers": [
+                    [k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers
+                ],
+                "body": base64.b64encode(self.body).decode("ascii"),
+                "fingerprint": self.fingerprint,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> "StoredResponse":
+        data = json.loads(raw)
+        return cls(
+            status=data["status"],
+            headers=[
+                (k.encode("latin-1"), v.encode("latin-1")) for k, v in data["headers"]
+            ],
+            body=base64.b64decode(data["body"]),
+            fingerprint=data["fingerprint"],
+        )
+
+
+class MemoryIdempotencyBackend:
+    def __init__(self, max_entries: int = 10_000, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, StoredResponse]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def set(self, key: str, response: StoredResponse) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def acquire(self, key: str) -> Optional[str]:
+        return LOCAL_LOCK
+
+    async def release(self, key: str, token: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisIdempotencyBackend:
+    def __init__(
+        self,
+        url: str,
+        ttl: float = 3600.0,
+        lock_timeout: float = 30.0,
+        prefix: str = "idempotency:",
+        client=None,
+    ):
+        if client is None:
+            try:
+                from redis import asyncio as redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "IDEMPOTENCY_BACKEND=redis requires the 'redis' package"
+                ) from e
+            client = redis.from_url(url)
+        self._redis = client
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        raw = await self._redis.get(self.prefix + key)
+        return StoredResponse.from_json(raw) if raw is not None else None
+
+    async def set(self, key: str, response: StoredResponse) -> None:
+        await self._redis.set(
+            self.prefix + key, response.to_json(), px=int(self.ttl * 1000)
+        )
+
+    async def acquire(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        acquired = await self._redis.set(
+            f"{self.prefix}{key}:lock",
+            token,
+            nx=True,
+            px=int(self.lock_timeout * 1000),
+        )
+        return token if acquired else None
+
+    async def release(self, key: str, token: str) -> None:
+        await self._redis.eval(
+            RELEASE_LOCK_SCRIPT, 1, f"{self.prefix}{key}:lock", token
+        )
+
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend,
+        routes: FrozenSet[Tuple[str, str]] = frozenset(
+            {("POST", "/users"), ("POST", "/users/batch")}
+        ),
+        poll_interval: float = 0.05,
+        lock_timeout: float = 30.0,
+    ):
+        self.app = app
+        self.backend = backend
+        self.routes = routes
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or (scope["method"], scope["path"]) not in self.routes
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        header = dict(scope["headers"]).get(IDEMPOTENCY_HEADER)
+        if header is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not header or len(header) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        key = f"{scope['method']} {scope['path']} {header.decode('latin-1')}"
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        stored = await self._lookup(key)
+        while stored is None and key in self._in_flight:
+            stored = await self._lookup(key)
+        if stored is None:
+            stored = await self._execute(key, scope, body, fingerprint, send)
+            if stored is None:
+                return
+
+        await self._replay(stored, fingerprint, scope, receive, send)
+
+    async def _lookup(self, key: str) -> Optional[StoredResponse]:
+        while True:
+            leader = self._in_flight.get(key)
+            if leader is not None:
+                stored = await asyncio.shield(leader)
+                if stored is not None:
+                    return stored
+                continue
+            return await self.backend.get(key)
+
+    async def _execute(
+        self, key: str, scope: Scope, body: bytes, fingerprint: str, send: Send
+    ) -> Optional[StoredResponse]:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        stored = None
+        lock = None
+        try:
+            lock = await self.backend.acquire(key)
+            if lock is None:
+                stored, lock = await self._wait_for_peer(key)
+                if stored is not None:
+                    return stored
+                if lock is None:
+                    response = JSONResponse(
+                        {
+                            "detail": "A request with this Idempotency-Key "
+                            "is still in progress"
+                        },
+                        status_code=409,
+                    )
+                    await response(scope, _replay_body(body), send)
+                    return None
+
+            status = 500
+            headers: List[Tuple[bytes, bytes]] = []
+            chunks: List[bytes] = []
+
+            async def capture(message: Message) -> None:
+                nonlocal status, headers
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    headers = list(message.get("headers", []))
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+                await send(message)
+
+            await self.app(scope, _replay_body(body), capture)
+
+            if status < 500:
+                stored = StoredResponse(status, headers, b"".join(chunks), fingerprint)
+                await self.backend.set(key, stored)
+            return None
+        finally:
+            del self._in_flight[key]
+            future.set_result(stored)
+            if lock is not None:
+                await self.backend.release(key, lock)
+
+    async def _wait_for_peer(
+        self, key: str
+    ) -> Tuple[Optional[StoredResponse], Optional[str]]:
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            stored = await self.backend.get(key)
+            if stored is not None:
+                return stored, None
+            lock = await self.backend.acquire(key)
+            if lock is not None:
+                return None, lock
+        return None, None
+
+    async def _replay(
+        self,
+        stored: StoredResponse,
+        fingerprint: str,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used with a different payload"},
+                status_code=422,
+            )
+            await response(scope, receive, send)
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": stored.headers + [REPLAYED_HEADER],
+            }
+        )
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes) -> Receive:
+    sent = False
+
+    async def receive() -> Message:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return receive
@@ -1,43 +1,74 @@
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, status
-from pydantic import BaseModel, EmailStr, Field
+from fastapi import FastAPI, HTTPException, Query, Response, status
+from pydantic import BaseModel, TypeAdapter
+
+from src.access_log import AccessLogMiddleware, configure_logging, parse_sample_rates
+from src.admission import AdmissionControlMiddleware, LoadMonitor
+from src.batch import BatchPlan
+from src.config import settings
+from src.idempotency import (
+    IdempotencyMiddleware,
+    MemoryIdempotencyBackend,
+    RedisIdempotencyBackend,
+)
+from src.models import BatchRequest, BatchResponse, User, UserBase, UserCreate
+from src.profiling import ProfiledRoute, Profiler, ProfilingMiddleware, profile_phase
+from src.sharding import DuplicateUserError, create_store
+from src.singleflight import SingleFlight
+
+log_handler, log_listener = configure_logging(
+    level=settings.log_level,
+    fmt=settings.log_format,
+    queue_size=settings.log_queue_size,
+    sampled_routes=settings.log_sampled_routes,
+    sample_rates=parse_sample_rates(settings.log_sample_rates),
+)
+load_monitor = LoadMonitor(
+    max_in_flight=settings.max_in_flight,
+    max_loop_lag_ms=settings.max_loop_lag_ms,
+    interval_ms=settings.loop_lag_interval_ms,
+)
+profiler = Profiler(
+    sample_rate=settings.profiling_sample_rate,
+    slow_threshold_ms=settings.profiling_slow_ms,
+    cprofile=settings.profiling_cprofile,
+    buffer_size=settings.profiling_buffer_size,
+)
+if settings.idempotency_backend == "redis":
+    idempotency_backend = RedisIdempotencyBackend(
+        settings.redis_url, ttl=settings.idempotency_ttl_seconds
+    )
+else:
+    idempotency_backend = MemoryIdempotencyBackend(
+        max_entries=settings.idempotency_max_entries,
+        ttl=settings.idempotency_ttl_seconds,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener.start()
+    load_monitor.start()
+    yield
+    await load_monitor.stop()
+    log_listener.stop()
+
 
 app = FastAPI(
     title="User Management API",
     description="API de gestion d'utilisateurs pour démonstration CI/CD",
     version="1.0.0",
+    lifespan=lifespan,
 )
-
-
-class UserBase(BaseModel):
-    username: str = Field(..., min_length=3, max_length=50)
-    email: EmailStr
-    full_name: Optional[str] = None
-
-
-class UserCreate(UserBase):
-    password: str = Field(..., min_length=8)
-
-
-class User(UserBase):
-    id: int
-    is_active: bool = True
-    created_at: datetime
-
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "username": "johndoe",
-                "email": "john@example.com",
-                "full_name": "John Doe",
-                "is_active": True,
-                "created_at": "2024-01-01T12:00:00",
-            }
-        }
+app.router.route_class = ProfiledRoute
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+app.add_middleware(IdempotencyMiddleware, backend=idempotency_backend)
+app.add_middleware(AdmissionControlMiddleware, monitor=load_monitor)
+app.add_middleware(AccessLogMiddleware)
 
 
 class HealthCheck(BaseModel):
@@ -46,8 +77,18 @@ class HealthCheck(BaseModel):
     timestamp: datetime
 
 
-users_db: List[User] = []
-user_id_counter = 1
+class ReadinessCheck(HealthCheck):
+    in_flight: int
+    loop_lag_ms: float
+    shed_total: int
+    checks: Dict[str, bool]
+
+
+store = create_store(settings.shard_count, settings.shard_sockets)
+reads = SingleFlight()
+user_list_adapter = TypeAdapter(List[User])
+
+load_monitor.add_check("store", store.ping)
 
 
 @app.get("/", response_model=dict)
@@ -68,98 +109,163 @@ async def health_check():
     )
 
 
+@app.get("/health/live", response_model=HealthCheck)
+async def liveness_check():
+    return HealthCheck(
+        status="alive",
+        version="1.0.0",
+        timestamp=datetime.now(),
+    )
+
+
+@app.get("/health/ready", response_model=ReadinessCheck)
+async def readiness_check(response: Response):
+    checks = await load_monitor.run_checks()
+    overload = load_monitor.overload_reason()
+    ready = overload is None and all(checks.values())
+
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return ReadinessCheck(
+        status="ready" if ready else "unavailable",
+        version="1.0.0",
+        timestamp=datetime.now(),
+        in_flight=load_monitor.in_flight,
+        loop_lag_ms=round(load_monitor.loop_lag_ms, 3),
+        shed_total=load_monitor.shed_total,
+        checks=checks,
+    )
+
+
+@app.get("/admin/profiling/slow-requests", response_model=List[Dict[str, Any]])
+async def list_slow_requests(limit: Optional[int] = Query(None, ge=1)):
+    return profiler.snapshot(limit)
+
+
+@app.get("/admin/singleflight", response_model=Dict[str, Any])
+async def singleflight_stats():
+    return reads.stats()
+
+
+@app.delete("/admin/profiling/slow-requests", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_requests():
+    profiler.clear()
+
+
 @app.post("/users", response_model=User, status_code=status.HTTP_201_CREATED)
 async def create_user(user: UserCreate):
-    global user_id_counter
+    try:
+        with profile_phase("store"):
+            created = await store.add(user)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    if any(u.username == user.username for u in users_db):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Username '{user.username}' already exists",
-        )
+    _forget_reads(created.id)
+    return created
 
-    if any(u.email == user.email for u in users_db):
+
+@app.post("/users/batch", response_model=BatchResponse)
+async def batch_users(batch: BatchRequest, response: Response):
+    if batch.atomic and not store.transactional:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Email '{user.email}' already exists",
+            detail="Atomic batches are not supported with remote shards",
         )
 
-    new_user = User(
-        id=user_id_counter,
-        username=user.username,
-        email=user.email,
-        full_name=user.full_name,
-        is_active=True,
-        created_at=datetime.now(),
-    )
+    with profile_phase("store"):
+        plan = await BatchPlan.build(store, batch.operations, batch.atomic)
+    committed = plan.ok or not batch.atomic
 
-    users_db.append(new_user)
-    user_id_counter += 1
+    if committed:
+        with profile_phase("store"):
+            committed = await plan.commit()
+    else:
+        plan.abort()
 
-    return new_user
+    if committed:
+        _forget_reads(
+            *(op.user_id for op in batch.operations if op.op != "create"),
+            *(result.user.id for result in plan.results if result.user is not None),
+        )
+    else:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+
+    return BatchResponse(atomic=batch.atomic, committed=committed, results=plan.results)
 
 
 @app.get("/users", response_model=List[User])
 async def list_users(skip: int = 0, limit: int = 100):
-    return users_db[skip : skip + limit]
+    body = await reads.do(("list", skip, limit), lambda: _fetch_users(skip, limit))
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/users/{user_id}", response_model=User)
 async def get_user(user_id: int):
-    user = next((u for u in users_db if u.id == user_id), None)
+    body = await reads.do(("user", user_id), lambda: _fetch_user(user_id))
 
-    if user is None:
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {user_id} not found",
         )
 
-    return user
+    return Response(content=body, media_type="application/json")
 
 
 @app.put("/users/{user_id}", response_model=User)
 async def update_user(user_id: int, user_update: UserBase):
-    user = next((u for u in users_db if u.id == user_id), None)
+    try:
+        with profile_phase("store"):
+            updated = await store.update(user_id, user_update)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    if user is None:
+    if updated is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {user_id} not found",
         )
 
-    if any(u.username == user_update.username and u.id != user_id for u in users_db):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Username '{user_update.username}' already exists",
-        )
-
-    if any(u.email == user_update.email and u.id != user_id for u in users_db):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Email '{user_update.email}' already exists",
-        )
-
-    user.username = user_update.username
-    user.email = user_update.email
-    user.full_name = user_update.full_name
-
-    return user
+    _forget_reads(user_id)
+    return updated
 
 
 @app.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(user_id: int):
-    global users_db
+    with profile_phase("store"):
+        deleted = await store.delete(user_id)
 
-    user = next((u for u in users_db if u.id == user_id), None)
-
-    if user is None:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {user_id} not found",
         )
 
-    users_db = [u for u in users_db if u.id != user_id]
+    _forget_reads(user_id)
+
+
+def _forget_reads(*user_ids: int) -> None:
+    for user_id in user_ids:
+        reads.forget(("user", user_id))
+    for key in reads.keys():
+        if key[0] == "list":
+            reads.forget(key)
+
+
+async def _fetch_users(skip: int, limit: int) -> bytes:
+    with profile_phase("store"):
+        users = await store.list(skip, limit)
+    with profile_phase("serialization"):
+        return user_list_adapter.dump_json(users)
+
+
+async def _fetch_user(user_id: int) -> Optional[bytes]:
+    with profile_phase("store"):
+        user = await store.get(user_id)
+    with profile_phase("serialization"):
+        return user.model_dump_json().encode() if user is not None else None
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, access_log=False)
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from src.emails import CachedEmailStr
+
+
+class UserBase(BaseModel):
+    username: str = Field(..., min_length=3, max_length=50)
+    email: CachedEmailStr
+    full_name: Optional[str] = None
+
+
+class UserCreate(UserBase):
+    password: str = Field(..., min_length=8)
+
+
+class User(UserBase):
+    id: int
+    is_active: bool = True
+    created_at: datetime
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": 1,
+                "username": "johndoe",
+                "email": "john@example.com",
+                "full_name": "John Doe",
+                "is_active": True,
+                "created_at": "2024-01-01T12:00:00",
+            }
+        }
+
+
+MAX_BATCH_OPERATIONS = 1000
+
+
+class CreateOperation(BaseModel):
+    op: Literal["create"]
+    user: UserCreate
+
+
+class UpdateOperation(BaseModel):
+    op: Literal["update"]
+    user_id: int
+    user: UserBase
+
+
+class DeleteOperation(BaseModel):
+    op: Literal["delete"]
+    user_id: int
+
+
+BatchOperation = Annotated[
+    Union[CreateOperation, UpdateOperation, DeleteOperation],
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_OPERATIONS
+    )
+    atomic: bool = False
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    user: Optional[User] = None
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    atomic: bool
+    committed: bool
+    results: List[BatchOperationResult]
@@ -0,0 +1,180 @@
+import asyncio
+import cProfile
+import functools
+import io
+import pstats
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+class RequestProfile:
+    __slots__ = ("method", "path", "status_code", "started", "phases", "_last")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.status_code: Optional[int] = None
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._last = self.started
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        elapsed = (now - self._last) * 1000
+        self.phases[phase] = round(self.phases.get(phase, 0.0) + elapsed, 3)
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        return (self._last - self.started) * 1000
+
+
+class Profiler:
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        slow_threshold_ms: float = 0.0,
+        cprofile: bool = False,
+        buffer_size: int = 100,
+        pstats_limit: int = 25,
+    ):
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.cprofile = cprofile
+        self.pstats_limit = pstats_limit
+        self.records: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.recorded_total = 0
+        self._cprofile_busy = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.slow_threshold_ms > 0
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start_cprofile(self) -> Optional[cProfile.Profile]:
+        if self._cprofile_busy:
+            return None
+        self._cprofile_busy = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop_cprofile(self, profile: cProfile.Profile) -> str:
+        profile.disable()
+        self._cprofile_busy = False
+        buffer = io.StringIO()
+        stats = pstats.Stats(profile, stream=buffer)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.pstats_limit)
+        return buffer.getvalue()
+
+    def record(
+        self, profile: RequestProfile, sampled: bool, pstats_text: Optional[str]
+    ) -> None:
+        total_ms = profile.total_ms
+        slow = 0 < self.slow_threshold_ms <= total_ms
+        if not (sampled or slow):
+            return
+        self.records.append(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "method": profile.method,
+                "path": profile.path,
+                "status_code": profile.status_code,
+                "total_ms": round(total_ms, 3),
+                "phases": profile.phases,
+                "reason": "slow" if slow else "sampled",
+                "pstats": pstats_text,
+            }
+        )
+        self.recorded_total += 1
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        records = list(self.records)
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return records
+
+    def clear(self) -> None:
+        self.records.clear()
+
+
+@contextmanager
+def profile_phase(phase: str) -> Iterator[None]:
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    profile.mark("handler")
+    try:
+        yield
+    finally:
+        profile.mark(phase)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        sampled = self.profiler.should_sample()
+        cprof = None
+        if sampled and self.profiler.cprofile:
+            cprof = self.profiler.start_cprofile()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                profile.mark("serialization")
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            profile.mark("response_write")
+            pstats_text = self.profiler.stop_cprofile(cprof) if cprof else None
+            self.profiler.record(profile, sampled, pstats_text)
+
+
+class ProfiledRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(
+            endpoint, "__profiled__", False
+        ):
+
+            @functools.wraps(endpoint)
+            async def profiled_endpoint(*args, **kwargs):
+                profile = _current_profile.get()
+                if profile is None:
+                    return await endpoint(*args, **kwargs)
+                profile.mark("validation")
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    profile.mark("handler")
+
+            profiled_endpoint.__profiled__ = True
+            self.dependant.call = profiled_endpoint
+        return super().get_route_handler()
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.models import User, UserBase
+from src.sharding import ShardNode
+
+
+def _user(user: User) -> Dict[str, Any]:
+    return user.model_dump(mode="json")
+
+
+def build_handlers(node: ShardNode) -> Dict[str, Callable[..., Awaitable[Any]]]:
+    async def list_users(skip: int, limit: int) -> List[Dict[str, Any]]:
+        return [_user(u) for u in await node.list(skip, limit)]
+
+    async def get(user_id: int) -> Optional[Dict[str, Any]]:
+        return _optional(await node.get(user_id))
+
+    async def add(data: Dict[str, Any]) -> Dict[str, Any]:
+        return _user(await node.add(UserBase.model_validate(data)))
+
+    async def insert(data: Dict[str, Any]) -> Dict[str, Any]:
+        return _user(await node.insert(User.model_validate(data)))
+
+    async def update(user_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return _optional(await node.update(user_id, UserBase.model_validate(data)))
+
+    return {
+        "ping": node.ping,
+        "clear": node.clear,
+        "count": node.count,
+        "next_id": node.next_id,
+        "allocate_id": node.allocate_id,
+        "list": list_users,
+        "get": get,
+        "add": add,
+        "insert": insert,
+        "update": update,
+        "delete": node.delete,
+        "owner": node.owner,
+        "claim": node.claim,
+        "release": node.release,
+    }
+
+
+def _optional(user: Optional[User]) -> Optional[Dict[str, Any]]:
+    return _user(user) if user is not None else None
+
+
+async def serve(path: str, index: int, count: int) -> None:
+    handlers = build_handlers(ShardNode(index, count))
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    method = handlers[request["method"]]
+                    response = {"result": await method(*request.get("args", []))}
+                except Exception as e:
+                    response = {"error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(handle, path=path)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="User store shard process")
+    parser.add_argument("--socket", required=True)
+    parser.add_argument("--index", type=int, required=True)
+    parser.add_argument("--count", type=int, required=True)
+    args = parser.parse_args()
+    asyncio.run(serve(args.socket, args.index, args.count))
+
+
+if __name__ == "__main__":
+    main()
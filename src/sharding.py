@@ -0,0 +1,435 @@
+import asyncio
+import hashlib
+import heapq
+import json
+from bisect import bisect
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from src.emails import canonical_email
+from src.models import User, UserBase
+from src.store import InMemoryUserStore
+
+USERNAME = "username"
+EMAIL = "email"
+
+
+class DuplicateUserError(ValueError):
+    def __init__(self, field: str, value: str):
+        super().__init__(f"{field.capitalize()} '{value}' already exists")
+        self.field = field
+        self.value = value
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, nodes: int, replicas: int = 64):
+        points = sorted(
+            (_hash(f"shard-{node}-{replica}"), node)
+            for node in range(nodes)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key: str) -> int:
+        index = bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class UserDirectory:
+    def __init__(self):
+        self._owners: Dict[str, Dict[str, int]] = {USERNAME: {}, EMAIL: {}}
+        self._journal: Optional[List[Callable[[], None]]] = None
+
+    def owner(self, kind: str, key: str) -> Optional[int]:
+        return self._owners[kind].get(key)
+
+    def claim(self, kind: str, key: str, user_id: int) -> bool:
+        owners = self._owners[kind]
+        owner = owners.get(key)
+        if owner is not None:
+            return owner == user_id
+        owners[key] = user_id
+        self._record(kind, key, None)
+        return True
+
+    def release(self, kind: str, key: str, user_id: int) -> None:
+        owners = self._owners[kind]
+        if owners.get(key) == user_id:
+            del owners[key]
+            self._record(kind, key, user_id)
+
+    def clear(self) -> None:
+        for owners in self._owners.values():
+            owners.clear()
+
+    @contextmanager
+    def transaction(self) -> Iterator["UserDirectory"]:
+        self._journal = []
+        try:
+            yield self
+        except BaseException:
+            journal, self._journal = self._journal, None
+            for undo in reversed(journal):
+                undo()
+            raise
+        else:
+            self._journal = None
+
+    def _record(self, kind: str, key: str, previous: Optional[int]) -> None:
+        if self._journal is None:
+            return
+        owners = self._owners[kind]
+        if previous is None:
+            self._journal.append(lambda: owners.pop(key, None))
+        else:
+            self._journal.append(lambda: owners.__setitem__(key, previous))
+
+
+class ShardNode:
+    transactional = True
+
+    def __init__(self, index: int = 0, count: int = 1):
+        self.users = InMemoryUserStore(id_stride=count, id_offset=index)
+        self.directory = UserDirectory()
+
+    async def ping(self) -> bool:
+        return self.users.ping()
+
+    async def clear(self) -> None:
+        self.users.clear()
+        self.directory.clear()
+
+    async def count(self) -> int:
+        return len(self.users)
+
+    async def next_id(self) -> int:
+        return self.users.next_id
+
+    async def allocate_id(self) -> int:
+        return self.users.allocate_id()
+
+    async def list(self, skip: int, limit: int) -> List[User]:
+        return self.users.list(skip, limit)
+
+    async def get(self, user_id: int) -> Optional[User]:
+        return self.users.get(user_id)
+
+    async def add(self, data: UserBase) -> User:
+        return self.users.add(data)
+
+    async def insert(self, user: User) -> User:
+        return self.users.insert(user)
+
+    async def update(self, user_id: int, data: UserBase) -> Optional[User]:
+        return self.users.update(user_id, data)
+
+    async def delete(self, user_id: int) -> bool:
+        return self.users.delete(user_id)
+
+    async def owner(self, kind: str, key: str) -> Optional[int]:
+        return self.directory.owner(kind, key)
+
+    async def claim(self, kind: str, key: str, user_id: int) -> bool:
+        return self.directory.claim(kind, key, user_id)
+
+    async def release(self, kind: str, key: str, user_id: int) -> None:
+        self.directory.release(kind, key, user_id)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["ShardNode"]:
+        with self.users.transaction(), self.directory.transaction():
+            yield self
+
+
+class RemoteShard:
+    transactional = False
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        payload = json.dumps({"method": method, "args": args}).encode() + b"\n"
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock = loop, asyncio.Lock()
+            self._reader = self._writer = None
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    self._reader, self._writer = await asyncio.wait_for(
+                        asyncio.open_unix_connection(self.path), self.timeout
+                    )
+                self._writer.write(payload)
+                await self._writer.drain()
+                line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+            except BaseException:
+                self.close()
+                raise
+            if not line:
+                self.close()
+                raise ConnectionError(f"Shard at {self.path} closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(f"Shard at {self.path}: {response['error']}")
+        return response["result"]
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def ping(self) -> bool:
+        try:
+            return await self._call("ping")
+        except (OSError, RuntimeError):
+            return False
+
+    async def clear(self) -> None:
+        await self._call("clear")
+
+    async def count(self) -> int:
+        return await self._call("count")
+
+    async def next_id(self) -> int:
+        return await self._call("next_id")
+
+    async def allocate_id(self) -> int:
+        return await self._call("allocate_id")
+
+    async def list(self, skip: int, limit: int) -> List[User]:
+        return [User.model_validate(u) for u in await self._call("list", skip, limit)]
+
+    async def get(self, user_id: int) -> Optional[User]:
+        return _user_or_none(await self._call("get", user_id))
+
+    async def add(self, data: UserBase) -> User:
+        return User.model_validate(await self._call("add", _dump_base(data)))
+
+    async def insert(self, user: User) -> User:
+        return User.model_validate(await self._call("insert", _dump(user)))
+
+    async def update(self, user_id: int, data: UserBase) -> Optional[User]:
+        return _user_or_none(await self._call("update", user_id, _dump_base(data)))
+
+    async def delete(self, user_id: int) -> bool:
+        return await self._call("delete", user_id)
+
+    async def owner(self, kind: str, key: str) -> Optional[int]:
+        return await self._call("owner", kind, key)
+
+    async def claim(self, kind: str, key: str, user_id: int) -> bool:
+        return await self._call("claim", kind, key, user_id)
+
+    async def release(self, kind: str, key: str, user_id: int) -> None:
+        await self._call("release", kind, key, user_id)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["RemoteShard"]:
+        yield self
+
+
+Shard = Union[ShardNode, RemoteShard]
+
+
+class ShardedIdAllocator:
+    def __init__(self, store: "ShardedUserStore", next_ids: List[int]):
+        self.store = store
+        self.next_ids = next_ids
+
+    def allocate(self, username: str) -> int:
+        shard = self.store.home_shard(username)
+        user_id = self.next_ids[shard]
+        self.next_ids[shard] += len(self.next_ids)
+        return user_id
+
+
+class ShardedUserStore:
+    def __init__(self, shards: Sequence[Shard], replicas: int = 64):
+        self.shards = list(shards)
+        self.ring = HashRing(len(self.shards), replicas)
+
+    @property
+    def transactional(self) -> bool:
+        return all(shard.transactional for shard in self.shards)
+
+    async def ping(self) -> bool:
+        return all(await asyncio.gather(*(shard.ping() for shard in self.shards)))
+
+    async def clear(self) -> None:
+        for shard in self.shards:
+            await shard.clear()
+
+    async def count(self) -> int:
+        return sum(await asyncio.gather(*(shard.count() for shard in self.shards)))
+
+    def home_shard(self, username: str) -> int:
+        return self.ring.node_for(f"user:{username}")
+
+    def shard_for_id(self, user_id: int) -> Shard:
+        return self.shards[user_id % len(self.shards)]
+
+    async def id_allocator(self) -> ShardedIdAllocator:
+        next_ids = [await shard.next_id() for shard in self.shards]
+        return ShardedIdAllocator(self, next_ids)
+
+    async def list(self, skip: int = 0, limit: int = 100) -> List[User]:
+        if len(self.shards) == 1:
+            return await self.shards[0].list(skip, limit)
+        if skip < 0 or limit < 0:
+            counts = await asyncio.gather(*(s.count() for s in self.shards))
+            pages = await asyncio.gather(
+                *(s.list(0, n) for s, n in zip(self.shards, counts))
+            )
+            users = sorted((u for page in pages for u in page), key=_creation_order)
+            return users[skip : skip + limit]
+        pages = await asyncio.gather(*(s.list(0, skip + limit) for s in self.shards))
+        merged = heapq.merge(*pages, key=_creation_order)
+        return list(islice(merged, skip, skip + limit))
+
+    async def get(self, user_id: int) -> Optional[User]:
+        return await self.shard_for_id(user_id).get(user_id)
+
+    async def username_owner(self, username: str) -> Optional[int]:
+        return await self._directory(USERNAME, username).owner(USERNAME, username)
+
+    async def email_owner(self, email: str) -> Optional[int]:
+        key = canonical_email(email)
+        return await self._directory(EMAIL, key).owner(EMAIL, key)
+
+    async def username_taken(
+        self, username: str, exclude_id: Optional[int] = None
+    ) -> bool:
+        owner = await self.username_owner(username)
+        return owner is not None and owner != exclude_id
+
+    async def email_taken(self, email: str, exclude_id: Optional[int] = None) -> bool:
+        owner = await self.email_owner(email)
+        return owner is not None and owner != exclude_id
+
+    async def add(self, data: UserBase) -> User:
+        shard = self.shards[self.home_shard(data.username)]
+        user = User(
+            id=await shard.allocate_id(),
+            username=data.username,
+            email=data.email,
+            full_name=data.full_name,
+            is_active=True,
+            created_at=datetime.now(),
+        )
+        return await self.insert(user)
+
+    async def insert(self, user: User) -> User:
+        claimed = await self.claim(user.id, user)
+        try:
+            return await self.shard_for_id(user.id).insert(user)
+        except BaseException:
+            await self._release(user.id, claimed)
+            raise
+
+    async def update(self, user_id: int, data: UserBase) -> Optional[User]:
+        shard = self.shard_for_id(user_id)
+        previous = await shard.get(user_id)
+        if previous is None:
+            return None
+        previous = previous.model_copy()
+        claimed = await self.claim(user_id, data, previous)
+        try:
+            user = await shard.update(user_id, data)
+        except BaseException:
+            await self._release(user_id, claimed)
+            raise
+        if user is None:
+            await self._release(user_id, claimed)
+            return None
+        await self._release(user_id, _keys(previous).items() - _keys(user).items())
+        return user
+
+    async def delete(self, user_id: int) -> bool:
+        shard = self.shard_for_id(user_id)
+        user = await shard.get(user_id)
+        if user is None or not await shard.delete(user_id):
+            return False
+        await self.unclaim(user)
+        return True
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["ShardedUserStore"]:
+        async with AsyncExitStack() as stack:
+            for shard in self.shards:
+                await stack.enter_async_context(shard.transaction())
+            yield self
+
+    async def claim(
+        self, user_id: int, data: UserBase, previous: Optional[User] = None
+    ) -> List[Tuple[str, str]]:
+        kept = _keys(previous).items() if previous is not None else set()
+        claimed: List[Tuple[str, str]] = []
+        for kind, key in _keys(data).items():
+            if not await self._directory(kind, key).claim(kind, key, user_id):
+                await self._release(user_id, claimed)
+                raise DuplicateUserError(kind, getattr(data, kind))
+            if (kind, key) not in kept:
+                claimed.append((kind, key))
+        return claimed
+
+    async def unclaim(self, user: User) -> None:
+        await self._release(user.id, _keys(user).items())
+
+    def _directory(self, kind: str, key: str) -> Shard:
+        return self.shards[self.ring.node_for(f"{kind}:{key}")]
+
+    async def _release(self, user_id: int, keys: Iterable[Tuple[str, str]]) -> None:
+        for kind, key in keys:
+            await self._directory(kind, key).release(kind, key, user_id)
+
+
+def create_store(shard_count: int = 1, sockets: Sequence[str] = ()) -> ShardedUserStore:
+    if sockets:
+        return ShardedUserStore([RemoteShard(path) for path in sockets])
+    return ShardedUserStore(
+        [ShardNode(i, shard_count) for i in range(max(shard_count, 1))]
+    )
+
+
+def _keys(data: UserBase) -> Dict[str, str]:
+    return {USERNAME: data.username, EMAIL: canonical_email(data.email)}
+
+
+def _creation_order(user: User):
+    return user.created_at, user.id
+
+
+def _dump(user: User) -> Dict[str, Any]:
+    return user.model_dump(mode="json")
+
+
+def _dump_base(data: UserBase) -> Dict[str, Any]:
+    return data.model_dump(mode="json", include=set(UserBase.model_fields))
+
+
+def _user_or_none(data: Optional[Dict[str, Any]]) -> Optional[User]:
+    return User.model_validate(data) if data is not None else None
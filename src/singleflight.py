@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.requests = 0
+        self.executions = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.requests += 1
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        self._calls[key] = future
+        self.executions += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def forget(self, key: Hashable) -> None:
+        self._calls.pop(key, None)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        shared = self.requests - self.executions
+        ratio = shared / self.requests if self.requests else 0.0
+        return {
+            "requests": self.requests,
+            "executions": self.executions,
+            "shared": shared,
+            "coalescing_ratio": round(ratio, 4),
+            "in_flight": len(self._calls),
+        }
+
+    def reset_stats(self) -> None:
+        self.requests = 0
+        self.executions = 0
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,156 @@
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional
+
+from src.emails import canonical_email
+from src.models import User, UserBase
+
+
+class InMemoryUserStore:
+    def __init__(self, id_stride: int = 1, id_offset: int = 0):
+        self.id_stride = id_stride
+        self.id_offset = id_offset
+        self._users: Dict[int, User] = {}
+        self._ids_by_username: Dict[str, int] = {}
+        self._ids_by_email: Dict[str, int] = {}
+        self._next_id = id_stride + id_offset
+        self._journal: Optional[List[Callable[[], None]]] = None
+
+    def ping(self) -> bool:
+        return True
+
+    def clear(self) -> None:
+        self._users.clear()
+        self._ids_by_username.clear()
+        self._ids_by_email.clear()
+        self._next_id = self.id_stride + self.id_offset
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    def list(self, skip: int = 0, limit: int = 100) -> List[User]:
+        if skip < 0 or limit < 0:
+            return list(self._users.values())[skip : skip + limit]
+        return list(islice(self._users.values(), skip, skip + limit))
+
+    def get(self, user_id: int) -> Optional[User]:
+        return self._users.get(user_id)
+
+    def username_owner(self, username: str) -> Optional[int]:
+        return self._ids_by_username.get(username)
+
+    def email_owner(self, email: str) -> Optional[int]:
+        return self._ids_by_email.get(canonical_email(email))
+
+    def username_taken(self, username: str, exclude_id: Optional[int] = None) -> bool:
+        owner = self.username_owner(username)
+        return owner is not None and owner != exclude_id
+
+    def email_taken(self, email: str, exclude_id: Optional[int] = None) -> bool:
+        owner = self.email_owner(email)
+        return owner is not None and owner != exclude_id
+
+    def add(self, data: UserBase) -> User:
+        return self.insert(
+            User(
+                id=self._next_id,
+                username=data.username,
+                email=data.email,
+                full_name=data.full_name,
+                is_active=True,
+                created_at=datetime.now(),
+            )
+        )
+
+    def insert(self, user: User) -> User:
+        if user.id in self._users:
+            raise ValueError(f"User with id {user.id} already exists")
+        self._users[user.id] = user
+        self._index(user)
+        self.reserve_ids(user.id + self.id_stride)
+        self._record(lambda: self._remove(user.id))
+        return user
+
+    def allocate_id(self) -> int:
+        user_id = self._next_id
+        self.reserve_ids(user_id + self.id_stride)
+        return user_id
+
+    def reserve_ids(self, next_id: int) -> None:
+        if next_id > self._next_id:
+            previous = self._next_id
+            self._next_id = next_id
+            self._record(lambda: setattr(self, "_next_id", previous))
+
+    def update(self, user_id: int, data: UserBase) -> Optional[User]:
+        user = self._users.get(user_id)
+        if user is None:
+            return None
+        previous = UserBase.model_construct(
+            username=user.username, email=user.email, full_name=user.full_name
+        )
+        self._assign(user, data)
+        self._record(lambda: self._assign(user, previous))
+        return user
+
+    def delete(self, user_id: int) -> bool:
+        user = self._remove(user_id)
+        if user is None:
+            return False
+        self._record(lambda: self._restore(user))
+        return True
+
+    @contextmanager
+    def transaction(self) -> Iterator["InMemoryUserStore"]:
+        if self._journal is not None:
+            raise RuntimeError("Nested store transactions are not supported")
+        self._journal = []
+        try:
+            yield self
+        except BaseException:
+            journal, self._journal = self._journal, None
+            for undo in reversed(journal):
+                undo()
+            raise
+        else:
+            self._journal = None
+
+    def _record(self, undo: Callable[[], None]) -> None:
+        if self._journal is not None:
+            self._journal.append(undo)
+
+    def _assign(self, user: User, data: UserBase) -> None:
+        self._unindex(user)
+        user.username = data.username
+        user.email = data.email
+        user.full_name = data.full_name
+        self._index(user)
+
+    def _remove(self, user_id: int) -> Optional[User]:
+        user = self._users.pop(user_id, None)
+        if user is not None:
+            self._unindex(user)
+        return user
+
+    def _restore(self, user: User) -> None:
+        out_of_order = bool(self._users) and next(reversed(self._users)) > user.id
+        self._users[user.id] = user
+        self._index(user)
+        if out_of_order:
+            self._users = dict(sorted(self._users.items()))
+
+    def _index(self, user: User) -> None:
+        self._ids_by_username[user.username] = user.id
+        self._ids_by_email[canonical_email(user.email)] = user.id
+
+    def _unindex(self, user: User) -> None:
+        if self._ids_by_username.get(user.username) == user.id:
+            del self._ids_by_username[user.username]
+        email = canonical_email(user.email)
+        if self._ids_by_email.get(email) == user.id:
+            del self._ids_by_email[email]
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app, store
+
+
+@pytest.fixture(autouse=True)
+def reset_database():
+    asyncio.run(store.clear())
+    yield
+    asyncio.run(store.clear())
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def sample_user():
+    return {
+        "username": "testuser",
+        "email": "test@example.com",
+        "full_name": "Test User",
+        "password": "securepassword123",
+    }
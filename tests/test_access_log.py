@@ -0,0 +1,133 @@
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+from src.access_log import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    RouteSamplingFilter,
+    configure_logging,
+    parse_sample_rates,
+)
+from src.main import log_handler
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    drain()
+    yield
+    drain()
+
+
+def drain():
+    records = []
+    while True:
+        try:
+            records.append(log_handler.queue.get_nowait())
+        except queue.Empty:
+            return records
+
+
+def access_records():
+    return [r for r in drain() if r.name == "src.access"]
+
+
+class TestAccessLogMiddleware:
+    def test_logs_structured_access_record(self, client):
+        client.post(
+            "/users",
+            json={
+                "username": "testuser",
+                "email": "test@example.com",
+                "password": "securepassword123",
+            },
+        )
+        response = client.get("/users/1", headers={"X-Request-ID": "req-42"})
+
+        assert response.headers["X-Request-ID"] == "req-42"
+        record = access_records()[-1]
+        assert record.levelno == logging.INFO
+        assert record.request_id == "req-42"
+        assert record.method == "GET"
+        assert record.route == "/users/{user_id}"
+        assert record.path == "/users/1"
+        assert record.status == 200
+        assert record.user_id == "1"
+        assert record.latency_ms >= 0
+
+    def test_generates_request_id(self, client):
+        response = client.get("/users")
+        assert len(response.headers["X-Request-ID"]) == 32
+
+    def test_client_errors_logged_as_warning(self, client):
+        client.get("/users/999")
+        record = access_records()[-1]
+        assert record.levelno == logging.WARNING
+        assert record.status == 404
+
+    def test_health_info_records_are_sampled(self, client, monkeypatch):
+        (sampler,) = log_handler.filters
+        monkeypatch.setattr(sampler, "rates", {logging.INFO: 0.0})
+        client.get("/health")
+        client.get("/users")
+        assert [r.route for r in access_records()] == ["/users"]
+
+
+class TestJsonFormatter:
+    def test_formats_extra_fields(self):
+        record = logging.LogRecord(
+            "src.access", logging.INFO, __file__, 1, "GET %s", ("/users",), None
+        )
+        record.request_id = "abc"
+        record.status = 200
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry["message"] == "GET /users"
+        assert entry["level"] == "INFO"
+        assert entry["request_id"] == "abc"
+        assert entry["status"] == 200
+        assert "timestamp" in entry
+
+
+class TestRouteSamplingFilter:
+    def make_record(self, level, route):
+        record = logging.LogRecord("src.access", level, __file__, 1, "", None, None)
+        record.route = route
+        return record
+
+    def test_only_sampled_levels_and_routes_dropped(self):
+        sampler = RouteSamplingFilter(("/health",), {logging.INFO: 0.0})
+        assert not sampler.filter(self.make_record(logging.INFO, "/health"))
+        assert sampler.filter(self.make_record(logging.ERROR, "/health"))
+        assert sampler.filter(self.make_record(logging.INFO, "/users"))
+
+    def test_parse_sample_rates(self):
+        assert parse_sample_rates("INFO=0.01, debug=0") == {
+            logging.INFO: 0.01,
+            logging.DEBUG: 0.0,
+        }
+
+
+class TestQueueWriter:
+    def test_listener_writes_json_lines(self, monkeypatch):
+        root = logging.getLogger("src")
+        monkeypatch.setattr(root, "handlers", root.handlers)
+        stream = io.StringIO()
+        handler, listener = configure_logging(stream=stream)
+        listener.start()
+        try:
+            logging.getLogger("src.test").info("hello", extra={"route": "/users"})
+        finally:
+            listener.stop()
+        entry = json.loads(stream.getvalue().splitlines()[0])
+        assert entry["message"] == "hello"
+        assert entry["route"] == "/users"
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        record = logging.LogRecord("src", logging.INFO, __file__, 1, "x", None, None)
+        handler.handle(record)
+        handler.handle(record)
+        assert handler.dropped == 1
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.admission import LoadMonitor
+from src.main import app, load_monitor
+
+
+@pytest.fixture(autouse=True)
+def reset_monitor():
+    max_in_flight = load_monitor.max_in_flight
+    max_loop_lag_ms = load_monitor.max_loop_lag_ms
+    yield
+    load_monitor.max_in_flight = max_in_flight
+    load_monitor.max_loop_lag_ms = max_loop_lag_ms
+    load_monitor.in_flight = 0
+    load_monitor.loop_lag_ms = 0.0
+    load_monitor.shed_total = 0
+
+
+class TestLiveness:
+    def test_liveness_returns_alive(self, client):
+        response = client.get("/health/live")
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+
+    def test_liveness_ignores_overload(self, client):
+        load_monitor.in_flight = load_monitor.max_in_flight
+        response = client.get("/health/live")
+        assert response.status_code == 200
+
+
+class TestReadiness:
+    def test_readiness_reports_load(self, client):
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["in_flight"] == 0
+        assert data["loop_lag_ms"] >= 0
+        assert data["checks"] == {"store": True}
+
+    def test_readiness_unavailable_when_saturated(self, client):
+        load_monitor.in_flight = load_monitor.max_in_flight
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "unavailable"
+
+    def test_readiness_unavailable_when_check_fails(self, client):
+        load_monitor.add_check("broken", lambda: 1 / 0)
+        try:
+            response = client.get("/health/ready")
+        finally:
+            del load_monitor.checks["broken"]
+        assert response.status_code == 503
+        assert response.json()["checks"]["broken"] is False
+
+    def test_readiness_with_lifespan(self):
+        with TestClient(app) as client:
+            response = client.get("/health/ready")
+        assert response.status_code == 200
+
+
+class TestAdmissionControl:
+    def test_sheds_when_in_flight_exceeded(self, client):
+        load_monitor.max_in_flight = 0
+        response = client.get("/users")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert "overloaded" in response.json()["detail"]
+        assert load_monitor.shed_total == 1
+
+    def test_sheds_when_loop_lag_exceeded(self, client):
+        load_monitor.loop_lag_ms = load_monitor.max_loop_lag_ms + 1
+        response = client.get("/users")
+        assert response.status_code == 503
+
+    def test_admits_under_thresholds(self, client):
+        response = client.get("/users")
+        assert response.status_code == 200
+        assert load_monitor.in_flight == 0
+
+
+class TestLoadMonitor:
+    def test_overload_reason_none_when_idle(self):
+        monitor = LoadMonitor(max_in_flight=10, max_loop_lag_ms=50)
+        assert monitor.overload_reason() is None
+
+    def test_sampler_measures_blocked_loop(self):
+        async def scenario():
+            monitor = LoadMonitor(max_in_flight=10, max_loop_lag_ms=50, interval_ms=5)
+            monitor.start()
+            await asyncio.sleep(0.01)
+            time.sleep(0.05)
+            await asyncio.sleep(0.01)
+            lag = monitor.loop_lag_ms
+            await monitor.stop()
+            return lag
+
+        assert asyncio.run(scenario()) >= 30
@@ -0,0 +1,166 @@
+import pytest
+
+
+def create_op(username, email=None):
+    return {
+        "op": "create",
+        "user": {
+            "username": username,
+            "email": email or f"{username}@example.com",
+            "password": "securepassword123",
+        },
+    }
+
+
+def update_op(user_id, username, email=None):
+    return {
+        "op": "update",
+        "user_id": user_id,
+        "user": {"username": username, "email": email or f"{username}@example.com"},
+    }
+
+
+def delete_op(user_id):
+    return {"op": "delete", "user_id": user_id}
+
+
+def run_batch(client, operations, atomic=False):
+    return client.post(
+        "/users/batch", json={"operations": operations, "atomic": atomic}
+    )
+
+
+class TestBatchMutations:
+    def test_mixed_operations_in_order(self, client):
+        client.post("/users", json=create_op("existing")["user"])
+
+        response = run_batch(
+            client,
+            [
+                create_op("alice"),
+                update_op(1, "renamed"),
+                create_op("bob"),
+                delete_op(2),
+            ],
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["committed"] is True
+        assert [r["status"] for r in data["results"]] == [201, 200, 201, 204]
+        assert data["results"][0]["user"]["id"] == 2
+        assert data["results"][2]["user"]["id"] == 3
+
+        usernames = [u["username"] for u in client.get("/users").json()]
+        assert usernames == ["renamed", "bob"]
+
+    def test_uniqueness_checked_on_post_batch_state(self, client):
+        client.post("/users", json=create_op("alice")["user"])
+        client.post("/users", json=create_op("bob")["user"])
+
+        response = run_batch(
+            client,
+            [
+                update_op(1, "bob", "bob@example.com"),
+                update_op(2, "alice", "alice@example.com"),
+            ],
+            atomic=True,
+        )
+        assert response.status_code == 200
+        assert client.get("/users/1").json()["username"] == "bob"
+        assert client.get("/users/2").json()["username"] == "alice"
+
+    def test_delete_frees_username_within_batch(self, client):
+        client.post("/users", json=create_op("alice")["user"])
+
+        response = run_batch(client, [create_op("alice"), delete_op(1)])
+        assert [r["status"] for r in response.json()["results"]] == [201, 204]
+        assert client.get("/users/2").json()["username"] == "alice"
+
+    def test_non_atomic_rejects_only_conflicting_operations(self, client):
+        client.post("/users", json=create_op("alice")["user"])
+
+        response = run_batch(
+            client,
+            [
+                create_op("bob"),
+                create_op("alice", "other@example.com"),
+                create_op("eve"),
+            ],
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == [201, 400, 201]
+        assert "already exists" in results[1]["detail"]
+        assert len(client.get("/users").json()) == 3
+
+    def test_rejected_create_keeps_later_planning_ids(self, client):
+        client.post("/users", json=create_op("taken")["user"])
+
+        response = run_batch(
+            client,
+            [
+                create_op("taken", "other@example.com"),
+                create_op("bob"),
+                create_op("carol"),
+                update_op(3, "bob2"),
+            ],
+        )
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == [400, 201, 201, 200]
+        assert results[3]["user"]["id"] == results[1]["user"]["id"]
+        users = client.get("/users").json()
+        assert sorted(u["username"] for u in users) == ["bob2", "carol", "taken"]
+
+    @pytest.mark.parametrize(
+        "atomic, statuses", [(False, [400, 200]), (True, [400, 424])]
+    )
+    def test_existing_owner_keeping_username_wins_over_earlier_claim(
+        self, client, atomic, statuses
+    ):
+        client.post("/users", json=create_op("alice")["user"])
+        operations = [
+            create_op("alice", "new@example.com"),
+            update_op(1, "alice", "alice.renamed@example.com"),
+        ]
+
+        results = run_batch(client, operations, atomic=atomic).json()["results"]
+        assert [r["status"] for r in results] == statuses
+        assert results[0]["detail"] == "Username 'alice' already exists"
+
+    def test_duplicate_email_within_batch_case_insensitive(self, client):
+        response = run_batch(
+            client,
+            [
+                create_op("alice", "same@example.com"),
+                create_op("bob", "SAME@example.com"),
+            ],
+        )
+        assert [r["status"] for r in response.json()["results"]] == [201, 400]
+
+    def test_atomic_failure_applies_nothing(self, client):
+        client.post("/users", json=create_op("alice")["user"])
+
+        response = run_batch(
+            client,
+            [create_op("bob"), update_op(1, "carol"), delete_op(999)],
+            atomic=True,
+        )
+        assert response.status_code == 400
+        data = response.json()
+        assert data["committed"] is False
+        assert [r["status"] for r in data["results"]] == [424, 424, 404]
+
+        users = client.get("/users").json()
+        assert [u["username"] for u in users] == ["alice"]
+        assert client.post("/users", json=create_op("dave")["user"]).json()["id"] == 2
+
+    def test_created_then_deleted_id_is_not_reused(self, client):
+        run_batch(client, [create_op("temp"), delete_op(1)])
+        response = client.post("/users", json=create_op("alice")["user"])
+        assert response.json()["id"] == 2
+
+    def test_empty_batch_rejected(self, client):
+        assert run_batch(client, []).status_code == 422
+
+    def test_unknown_operation_rejected(self, client):
+        assert run_batch(client, [{"op": "upsert"}]).status_code == 422
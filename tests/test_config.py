@@ -0,0 +1,10 @@
+from src.config import Settings
+
+
+class TestSettings:
+    def test_list_settings_ignore_blank_items(self, monkeypatch):
+        monkeypatch.setenv("SHARD_SOCKETS", "/tmp/a.sock, , /tmp/b.sock ,")
+        monkeypatch.setenv("LOG_SAMPLED_ROUTES", " ")
+        settings = Settings.from_env()
+        assert settings.shard_sockets == ("/tmp/a.sock", "/tmp/b.sock")
+        assert settings.log_sampled_routes == ()
@@ -0,0 +1,77 @@
+import pytest
+from pydantic import BaseModel, EmailStr, ValidationError
+
+from src.emails import CachedEmailStr, canonical_email, normalize_email, validate_domain
+
+
+class CachedModel(BaseModel):
+    email: CachedEmailStr
+
+
+class ReferenceModel(BaseModel):
+    email: EmailStr
+
+
+@pytest.fixture(autouse=True)
+def clear_domain_cache():
+    validate_domain.cache_clear()
+    yield
+    validate_domain.cache_clear()
+
+
+class TestNormalizeEmail:
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "john@example.com",
+            "John.Doe@Example.COM",
+            "first+tag@sub.example.org",
+            "o'brien@example.co.uk",
+            "Jane Doe <jane@example.com>",
+            "  padded@example.com  ",
+            '"quoted local"@example.com',
+            "josé@example.com",
+            f"{'a' * 65}@example.com",
+        ],
+    )
+    def test_matches_email_str(self, value):
+        try:
+            expected = ReferenceModel(email=value).email
+        except ValidationError:
+            with pytest.raises(ValidationError):
+                CachedModel(email=value)
+            return
+        assert CachedModel(email=value).email == expected
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "not-an-email",
+            "a..b@example.com",
+            ".a@example.com",
+            "a@b@example.com",
+            "a@-example.com",
+            "a@example",
+        ],
+    )
+    def test_rejects_invalid(self, value):
+        with pytest.raises(ValidationError):
+            CachedModel(email=value)
+
+    def test_domain_is_cached(self):
+        normalize_email("one@example.com")
+        normalize_email("two@example.com")
+        info = validate_domain.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
+
+    def test_json_schema_format(self):
+        schema = CachedModel.model_json_schema()
+        assert schema["properties"]["email"]["format"] == "email"
+
+
+class TestCanonicalEmail:
+    def test_case_folded(self):
+        assert canonical_email("John@Example.com") == canonical_email(
+            "john@example.com"
+        )
@@ -0,0 +1,231 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from src.idempotency import (
+    IdempotencyMiddleware,
+    MemoryIdempotencyBackend,
+    RedisIdempotencyBackend,
+    StoredResponse,
+)
+from src.main import idempotency_backend, store
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    idempotency_backend.clear()
+    yield
+    idempotency_backend.clear()
+
+
+class TestIdempotentCreateUser:
+    def test_retry_replays_original_response(self, client, sample_user):
+        headers = {"Idempotency-Key": "abc-123"}
+        first = client.post("/users", json=sample_user, headers=headers)
+        retry = client.post("/users", json=sample_user, headers=headers)
+
+        assert first.status_code == 201
+        assert retry.status_code == 201
+        assert retry.content == first.content
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert asyncio.run(store.count()) == 1
+
+    def test_without_key_duplicate_is_rejected(self, client, sample_user):
+        client.post("/users", json=sample_user)
+        response = client.post("/users", json=sample_user)
+        assert response.status_code == 400
+
+    def test_key_reuse_with_different_payload(self, client, sample_user):
+        headers = {"Idempotency-Key": "abc-123"}
+        client.post("/users", json=sample_user, headers=headers)
+
+        other = dict(sample_user, username="otheruser", email="other@example.com")
+        response = client.post("/users", json=other, headers=headers)
+        assert response.status_code == 422
+        assert asyncio.run(store.count()) == 1
+
+    def test_distinct_keys_execute_separately(self, client, sample_user):
+        client.post("/users", json=sample_user, headers={"Idempotency-Key": "a"})
+        response = client.post(
+            "/users", json=sample_user, headers={"Idempotency-Key": "b"}
+        )
+        assert response.status_code == 400
+
+    def test_key_too_long(self, client, sample_user):
+        response = client.post(
+            "/users", json=sample_user, headers={"Idempotency-Key": "k" * 256}
+        )
+        assert response.status_code == 400
+        assert asyncio.run(store.count()) == 0
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def _alive(self, key):
+        entry = self.values.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            del self.values[key]
+            entry = None
+        return entry
+
+    async def get(self, key):
+        entry = self._alive(key)
+        return entry[0] if entry is not None else None
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and self._alive(key) is not None:
+            return None
+        expires_at = time.monotonic() + px / 1000 if px else float("inf")
+        self.values[key] = (value, expires_at)
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if await self.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+
+def redis_backend(redis, **kwargs):
+    return RedisIdempotencyBackend("redis://fake", client=redis, **kwargs)
+
+
+def make_counting_app(fail_first=False, backend=None):
+    calls = {"count": 0}
+    inner = FastAPI()
+
+    @inner.post("/users", status_code=201)
+    async def create():
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        if fail_first and calls["count"] == 1:
+            raise HTTPException(status_code=503, detail="unavailable")
+        return {"id": calls["count"]}
+
+    wrapped = IdempotencyMiddleware(
+        inner, backend=backend or MemoryIdempotencyBackend(), poll_interval=0.01
+    )
+    return wrapped, calls
+
+
+async def post_concurrently(wrapped, count):
+    return await asyncio.gather(*[post(wrapped) for _ in range(count)])
+
+
+async def post(wrapped):
+    transport = httpx.ASGITransport(app=wrapped)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/users", json={}, headers={"Idempotency-Key": "same"})
+
+
+class TestCoalescing:
+    def test_concurrent_duplicates_share_one_execution(self):
+        wrapped, calls = make_counting_app()
+
+        responses = asyncio.run(post_concurrently(wrapped, 10))
+        assert calls["count"] == 1
+        assert {r.status_code for r in responses} == {201}
+        assert {r.json()["id"] for r in responses} == {1}
+
+    def test_server_error_is_not_cached(self):
+        wrapped, calls = make_counting_app(fail_first=True)
+
+        responses = asyncio.run(post_concurrently(wrapped, 3))
+        assert calls["count"] == 2
+        assert sorted(r.status_code for r in responses) == [201, 201, 503]
+
+
+class TestRedisIdempotencyBackend:
+    def test_workers_sharing_redis_execute_once(self):
+        redis = FakeRedis()
+        first, calls = make_counting_app(backend=redis_backend(redis))
+        second = IdempotencyMiddleware(
+            first.app, backend=redis_backend(redis), poll_interval=0.01
+        )
+
+        async def scenario():
+            return await asyncio.gather(post(first), post(second))
+
+        responses = asyncio.run(scenario())
+        assert calls["count"] == 1
+        assert [r.json()["id"] for r in responses] == [1, 1]
+        assert sum("idempotent-replayed" in r.headers for r in responses) == 1
+
+    def test_lock_wait_timeout_returns_conflict(self):
+        redis = FakeRedis()
+        backend = redis_backend(redis)
+        wrapped, calls = make_counting_app(backend=backend)
+        wrapped.lock_timeout = 0.05
+
+        async def scenario():
+            await backend.acquire("POST /users same")
+            return await post(wrapped)
+
+        response = asyncio.run(scenario())
+        assert response.status_code == 409
+        assert calls["count"] == 0
+
+    def test_release_keeps_lock_taken_over_after_expiry(self):
+        redis = FakeRedis()
+        backend = redis_backend(redis, lock_timeout=0.01)
+
+        async def scenario():
+            stale = await backend.acquire("k")
+            await asyncio.sleep(0.02)
+            current = await backend.acquire("k")
+            await backend.release("k", stale)
+            return current, await backend.acquire("k")
+
+        current, again = asyncio.run(scenario())
+        assert current is not None
+        assert again is None
+
+    def test_stored_response_round_trips(self):
+        backend = redis_backend(FakeRedis())
+        response = StoredResponse(201, [(b"x-id", b"1")], b"{}", "fp")
+
+        async def scenario():
+            await backend.set("k", response)
+            return await backend.get("k")
+
+        assert asyncio.run(scenario()) == response
+
+
+class TestMemoryIdempotencyBackend:
+    def test_lru_eviction(self):
+        backend = MemoryIdempotencyBackend(max_entries=2)
+        response = StoredResponse(201, [], b"{}", "fp")
+
+        async def scenario():
+            await backend.set("a", response)
+            await backend.set("b", response)
+            await backend.get("a")
+            await backend.set("c", response)
+            return [await backend.get(k) for k in ("a", "b", "c")]
+
+        a, b, c = asyncio.run(scenario())
+        assert a is not None and b is None and c is not None
+
+    def test_ttl_expiry(self):
+        backend = MemoryIdempotencyBackend(ttl=0)
+
+        async def scenario():
+            await backend.set("a", StoredResponse(201, [], b"{}", "fp"))
+            return await backend.get("a")
+
+        assert asyncio.run(scenario()) is None
+        assert len(backend) == 0
+
+
+class TestStoredResponse:
+    def test_json_round_trip(self):
+        original = StoredResponse(
+            201, [(b"content-type", b"application/json")], b'{"id": 1}', "fp"
+        )
+        assert StoredResponse.from_json(original.to_json()) == original
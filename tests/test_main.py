@@ -1,35 +1,5 @@
 from datetime import datetime
 
-import pytest
-from fastapi.testclient import TestClient
-
-from src.main import app
-
-
-@pytest.fixture(autouse=True)
-def reset_database():
-    import src.main as main_module
-
-    main_module.users_db.clear()
-    main_module.user_id_counter = 1
-    yield
-    main_module.users_db.clear()
-
-
-@pytest.fixture
-def client():
-    return TestClient(app)
-
-
-@pytest.fixture
-def sample_user():
-    return {
-        "username": "testuser",
-        "email": "test@example.com",
-        "full_name": "Test User",
-        "password": "securepassword123",
-    }
-
 
 class TestRootEndpoint:
     def test_root_returns_welcome_message(self, client):
@@ -102,6 +72,17 @@ class TestCreateUser:
         assert response.status_code == 400
         assert "already exists" in response.json()["detail"]
 
+    def test_create_user_duplicate_email_case_insensitive(self, client, sample_user):
+        client.post("/users", json=sample_user)
+
+        duplicate_user = sample_user.copy()
+        duplicate_user["username"] = "differentuser"
+        duplicate_user["email"] = "Test@EXAMPLE.com"
+        response = client.post("/users", json=duplicate_user)
+
+        assert response.status_code == 400
+        assert "already exists" in response.json()["detail"]
+
     def test_create_user_invalid_email(self, client):
         invalid_user = {
             "username": "testuser",
@@ -259,6 +240,18 @@ class TestUpdateUser:
         assert response.status_code == 400
         assert "already exists" in response.json()["detail"]
 
+    def test_update_user_keeps_own_email_with_new_case(self, client, sample_user):
+        create_response = client.post("/users", json=sample_user)
+        user_id = create_response.json()["id"]
+
+        updated_data = {
+            "username": sample_user["username"],
+            "email": "TEST@example.com",
+        }
+        response = client.put(f"/users/{user_id}", json=updated_data)
+        assert response.status_code == 200
+        assert response.json()["email"] == "TEST@example.com"
+
 
 class TestDeleteUser:
     def test_delete_user_success(self, client, sample_user):
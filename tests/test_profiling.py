@@ -0,0 +1,114 @@
+import pytest
+
+from src.main import profiler
+from src.profiling import Profiler, RequestProfile
+
+
+@pytest.fixture(autouse=True)
+def reset_profiler():
+    yield
+    profiler.sample_rate = 0.0
+    profiler.slow_threshold_ms = 0.0
+    profiler.cprofile = False
+    profiler.clear()
+
+
+class TestProfilingDisabled:
+    def test_nothing_recorded_by_default(self, client):
+        client.get("/users")
+        assert client.get("/admin/profiling/slow-requests").json() == []
+
+
+class TestSampling:
+    def test_sampled_request_has_phase_breakdown(self, client, sample_user):
+        profiler.sample_rate = 1.0
+        client.post("/users", json=sample_user)
+
+        records = client.get("/admin/profiling/slow-requests").json()
+        record = records[0]
+        assert record["method"] == "POST"
+        assert record["path"] == "/users"
+        assert record["status_code"] == 201
+        assert record["reason"] == "sampled"
+        assert set(record["phases"]) == {
+            "validation",
+            "handler",
+            "store",
+            "serialization",
+            "response_write",
+        }
+        assert record["pstats"] is None
+
+    def test_read_routes_split_store_and_serialization(self, client, sample_user):
+        client.post("/users", json=sample_user)
+        profiler.sample_rate = 1.0
+        client.get("/users/1")
+
+        record = client.get("/admin/profiling/slow-requests").json()[0]
+        assert {"store", "serialization"} <= set(record["phases"])
+
+    def test_validation_error_skips_handler_phase(self, client):
+        profiler.sample_rate = 1.0
+        client.post("/users", json={"username": "ab"})
+
+        record = client.get("/admin/profiling/slow-requests").json()[0]
+        assert record["status_code"] == 422
+        assert "handler" not in record["phases"]
+
+    def test_cprofile_dump(self, client):
+        profiler.sample_rate = 1.0
+        profiler.cprofile = True
+        client.get("/users")
+
+        record = client.get("/admin/profiling/slow-requests?limit=1").json()[0]
+        assert "function calls" in record["pstats"]
+
+    def test_clear_records(self, client):
+        profiler.sample_rate = 1.0
+        client.get("/users")
+        profiler.sample_rate = 0.0
+        assert client.delete("/admin/profiling/slow-requests").status_code == 204
+        assert client.get("/admin/profiling/slow-requests").json() == []
+
+
+class TestSlowRequests:
+    def test_slow_threshold_records_unsampled_request(self, client):
+        profiler.slow_threshold_ms = 0.001
+        client.get("/users")
+
+        record = client.get("/admin/profiling/slow-requests").json()[0]
+        assert record["reason"] == "slow"
+
+    def test_fast_request_not_recorded(self):
+        local = Profiler(slow_threshold_ms=10_000)
+        local.record(RequestProfile("GET", "/users"), sampled=False, pstats_text=None)
+        assert local.snapshot() == []
+
+
+class TestProfiler:
+    def test_buffer_is_bounded(self):
+        local = Profiler(sample_rate=1.0, buffer_size=3)
+        for _ in range(5):
+            local.record(RequestProfile("GET", "/"), sampled=True, pstats_text=None)
+        assert len(local.snapshot()) == 3
+        assert local.recorded_total == 5
+
+    def test_snapshot_limit(self):
+        local = Profiler(sample_rate=1.0)
+        for _ in range(3):
+            local.record(RequestProfile("GET", "/"), sampled=True, pstats_text=None)
+        assert len(local.snapshot(2)) == 2
+        assert local.snapshot(0) == []
+
+    def test_non_positive_limit_rejected(self, client):
+        response = client.get("/admin/profiling/slow-requests?limit=0")
+        assert response.status_code == 422
+
+    def test_repeated_phase_accumulates(self):
+        profile = RequestProfile("GET", "/")
+        profile.phases["store"] = 1.0
+        profile.mark("store")
+        assert profile.phases["store"] >= 1.0
+
+    def test_disabled_when_no_sampling_configured(self):
+        assert Profiler().enabled is False
@@ -0,0 +1,454 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from src import main
+from src.admission import LoadMonitor
+from src.batch import BatchPlan
+from src.models import (
+    CreateOperation,
+    DeleteOperation,
+    UpdateOperation,
+    UserBase,
+    UserCreate,
+)
+from src.shard_server import serve
+from src.sharding import (
+    EMAIL,
+    USERNAME,
+    DuplicateUserError,
+    HashRing,
+    RemoteShard,
+    ShardedUserStore,
+    ShardNode,
+    UserDirectory,
+    create_store,
+)
+
+
+def make_user(username, email=None):
+    return UserBase(username=username, email=email or f"{username}@example.com")
+
+
+async def add_users(store, count):
+    return [await store.add(make_user(f"user{i}")) for i in range(count)]
+
+
+@pytest.fixture
+def sharded():
+    return create_store(shard_count=4)
+
+
+@pytest.fixture
+def server_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+async def cancel_pending():
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run_on(loop, coro):
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout=5)
+
+
+@pytest.fixture
+def remote_sockets(tmp_path, server_loop):
+    paths = [str(tmp_path / f"shard-{i}.sock") for i in range(2)]
+
+    async def start():
+        return [
+            asyncio.create_task(serve(path, i, len(paths)))
+            for i, path in enumerate(paths)
+        ]
+
+    tasks = run_on(server_loop, start())
+    deadline = time.monotonic() + 5
+    while not all(asyncio.run(RemoteShard(path).ping()) for path in paths):
+        assert time.monotonic() < deadline, "shard servers did not start"
+        time.sleep(0.01)
+    yield paths
+
+    async def stop():
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    run_on(server_loop, stop())
+
+
+@pytest.fixture
+def hung_socket(tmp_path, server_loop):
+    path = str(tmp_path / "hung.sock")
+
+    async def never_reply(reader, writer):
+        try:
+            await reader.read()
+        finally:
+            writer.close()
+
+    async def start():
+        return await asyncio.start_unix_server(never_reply, path=path)
+
+    server = run_on(server_loop, start())
+    yield path
+
+    async def stop():
+        server.close()
+        await server.wait_closed()
+
+    run_on(server_loop, stop())
+
+
+class TestHashRing:
+    def test_keys_spread_across_nodes(self):
+        ring = HashRing(4)
+        counts = Counter(ring.node_for(f"user{i}") for i in range(4000))
+        assert set(counts) == {0, 1, 2, 3}
+        assert min(counts.values()) > 500
+
+    def test_adding_a_node_moves_few_keys(self):
+        before, after = HashRing(4), HashRing(5)
+        keys = [f"user{i}" for i in range(4000)]
+        moved = sum(before.node_for(k) != after.node_for(k) for k in keys)
+        assert moved < len(keys) * 0.35
+
+
+class TestUserDirectory:
+    def test_claim_only_free_or_own_keys(self):
+        directory = UserDirectory()
+        assert directory.claim(USERNAME, "alice", 1)
+        assert directory.claim(USERNAME, "alice", 1)
+        assert not directory.claim(USERNAME, "alice", 2)
+        assert directory.claim(EMAIL, "alice", 2)
+        assert directory.owner(USERNAME, "alice") == 1
+
+    def test_release_ignores_other_owner(self):
+        directory = UserDirectory()
+        directory.claim(USERNAME, "alice", 1)
+        directory.release(USERNAME, "alice", 2)
+        assert directory.owner(USERNAME, "alice") == 1
+
+
+class TestCreateStore:
+    def test_single_shard_keeps_sequential_ids(self):
+        store = create_store()
+        users = asyncio.run(add_users(store, 3))
+        assert len(store.shards) == 1
+        assert [u.id for u in users] == [1, 2, 3]
+
+    def test_multiple_shards(self, sharded):
+        assert isinstance(sharded, ShardedUserStore)
+        assert len(sharded.shards) == 4
+
+
+class TestShardedUserStore:
+    def test_ids_encode_home_shard(self, sharded):
+        async def scenario():
+            users = await add_users(sharded, 20)
+            assert len({u.id for u in users}) == 20
+            for user in users:
+                home = sharded.home_shard(user.username)
+                assert user.id % 4 == home
+                assert await sharded.shards[home].get(user.id) is user
+
+        asyncio.run(scenario())
+
+    def test_cross_shard_uniqueness(self, sharded):
+        async def scenario():
+            user = await sharded.add(make_user("alice", "Alice@example.com"))
+            assert await sharded.username_taken("alice")
+            assert await sharded.email_taken("alice@EXAMPLE.com")
+            assert not await sharded.email_taken(
+                "alice@example.com", exclude_id=user.id
+            )
+
+        asyncio.run(scenario())
+
+    def test_duplicate_add_releases_partial_claims(self, sharded):
+        async def scenario():
+            await sharded.add(make_user("alice"))
+            with pytest.raises(DuplicateUserError) as error:
+                await sharded.add(make_user("bob", "ALICE@example.com"))
+            assert str(error.value) == "Email 'ALICE@example.com' already exists"
+            assert not await sharded.username_taken("bob")
+            assert await sharded.count() == 1
+
+        asyncio.run(scenario())
+
+    def test_conflicting_update_keeps_previous_claims(self, sharded):
+        async def scenario():
+            alice = await sharded.add(make_user("alice"))
+            await sharded.add(make_user("bob"))
+            with pytest.raises(DuplicateUserError):
+                await sharded.update(alice.id, make_user("alicia", "bob@example.com"))
+            assert await sharded.username_owner("alice") == alice.id
+            assert await sharded.email_owner("alice@example.com") == alice.id
+            assert not await sharded.username_taken("alicia")
+            assert (await sharded.get(alice.id)).username == "alice"
+
+        asyncio.run(scenario())
+
+    def test_update_moves_directory_entries(self, sharded):
+        async def scenario():
+            user = await sharded.add(make_user("alice"))
+            await sharded.update(user.id, make_user("alicia"))
+            assert not await sharded.username_taken("alice")
+            assert await sharded.username_owner("alicia") == user.id
+            assert (await sharded.get(user.id)).username == "alicia"
+
+        asyncio.run(scenario())
+
+    def test_delete_releases_directory_entries(self, sharded):
+        async def scenario():
+            user = await sharded.add(make_user("alice"))
+            assert await sharded.delete(user.id)
+            assert not await sharded.delete(user.id)
+            assert not await sharded.username_taken("alice")
+            assert not await sharded.email_taken("alice@example.com")
+
+        asyncio.run(scenario())
+
+    def test_list_merges_shards_in_creation_order(self, sharded):
+        async def scenario():
+            await add_users(sharded, 10)
+            users = await sharded.list(2, 3)
+            assert [u.username for u in users] == ["user2", "user3", "user4"]
+            assert await sharded.count() == 10
+
+        asyncio.run(scenario())
+
+    def test_transaction_rolls_back_every_shard(self, sharded):
+        async def scenario():
+            users = await add_users(sharded, 4)
+            with pytest.raises(RuntimeError):
+                async with sharded.transaction():
+                    await sharded.delete(users[0].id)
+                    await sharded.update(users[1].id, make_user("renamed"))
+                    await sharded.add(make_user("new"))
+                    raise RuntimeError("abort")
+
+            assert await sharded.count() == 4
+            assert await sharded.username_owner("user0") == users[0].id
+            assert await sharded.username_owner("user1") == users[1].id
+            assert not await sharded.username_taken("renamed")
+            assert not await sharded.username_taken("new")
+
+        asyncio.run(scenario())
+
+    def test_batch_swap_across_shards(self, sharded):
+        async def scenario():
+            alice = await sharded.add(make_user("alice"))
+            bob = await sharded.add(make_user("bob"))
+            plan = await BatchPlan.build(
+                sharded,
+                [
+                    UpdateOperation(
+                        op="update", user_id=alice.id, user=make_user("bob")
+                    ),
+                    UpdateOperation(
+                        op="update", user_id=bob.id, user=make_user("alice")
+                    ),
+                ],
+                atomic=True,
+            )
+            assert plan.ok
+            await plan.commit()
+            assert await sharded.username_owner("bob") == alice.id
+            assert await sharded.username_owner("alice") == bob.id
+
+        asyncio.run(scenario())
+
+    def test_batch_create_does_not_overwrite_concurrent_add(self, sharded):
+        alice = UserCreate(
+            username="alice", email="alice@example.com", password="securepassword123"
+        )
+
+        async def scenario():
+            plan = await BatchPlan.build(
+                sharded, [CreateOperation(op="create", user=alice)], atomic=True
+            )
+            provisional = plan.results[0].user.id
+            other_worker = ShardedUserStore(sharded.shards)
+            name = next(
+                f"zed{i}"
+                for i in range(100)
+                if other_worker.home_shard(f"zed{i}") == provisional % 4
+            )
+            zed = await other_worker.add(make_user(name))
+            assert zed.id == provisional
+
+            await plan.commit()
+            created = plan.results[0].user
+            assert created.id != zed.id
+            assert (await sharded.get(created.id)).username == "alice"
+            assert (await sharded.get(zed.id)).username == name
+            assert await sharded.username_owner(name) == zed.id
+
+        asyncio.run(scenario())
+
+    @pytest.mark.parametrize(
+        "atomic, statuses, usernames",
+        [(False, [400, 201], ["alice", "bob"]), (True, [400, 424], ["alice"])],
+    )
+    def test_batch_commit_loses_claim_to_concurrent_add(
+        self, sharded, atomic, statuses, usernames
+    ):
+        operations = [
+            CreateOperation(
+                op="create",
+                user=UserCreate(
+                    username=name,
+                    email=f"{name}@example.com",
+                    password="securepassword123",
+                ),
+            )
+            for name in ("alice", "bob")
+        ]
+
+        async def scenario():
+            plan = await BatchPlan.build(sharded, operations, atomic=atomic)
+            await ShardedUserStore(sharded.shards).add(make_user("alice"))
+            committed = await plan.commit()
+            users = await sharded.list()
+            return committed, plan.results, [u.username for u in users]
+
+        committed, results, stored = asyncio.run(scenario())
+        assert committed is not atomic
+        assert [r.status for r in results] == statuses
+        assert results[0].detail == "Username 'alice' already exists"
+        assert stored == usernames
+
+    def test_batch_delete_unknown_user(self, sharded):
+        async def scenario():
+            return await BatchPlan.build(
+                sharded, [DeleteOperation(op="delete", user_id=123)], atomic=False
+            )
+
+        plan = asyncio.run(scenario())
+        assert [r.status for r in plan.results] == [404]
+
+
+class TestShardNode:
+    def test_ids_are_strided(self):
+        node = ShardNode(index=2, count=4)
+
+        async def scenario():
+            return [(await node.add(make_user(f"user{i}"))).id for i in range(3)]
+
+        assert asyncio.run(scenario()) == [6, 10, 14]
+
+
+class TestRemoteShards:
+    def test_crud_over_unix_sockets(self, remote_sockets):
+        store = create_store(sockets=remote_sockets)
+
+        async def scenario():
+            user = await store.add(make_user("alice"))
+            assert await store.get(user.id) == user
+            assert await store.username_taken("alice")
+            updated = await store.update(user.id, make_user("alicia"))
+            assert updated.username == "alicia"
+            assert [u.username for u in await store.list()] == ["alicia"]
+            assert await store.delete(user.id)
+            assert await store.get(user.id) is None
+            assert not await store.username_taken("alicia")
+            assert await store.ping()
+
+        asyncio.run(scenario())
+
+    def test_concurrent_calls_share_connection(self, remote_sockets):
+        store = create_store(sockets=remote_sockets)
+
+        async def scenario():
+            await asyncio.gather(*(store.add(make_user(f"user{i}")) for i in range(20)))
+            return await store.count()
+
+        assert asyncio.run(scenario()) == 20
+
+    def test_concurrent_workers_cannot_create_duplicates(self, remote_sockets):
+        workers = [create_store(sockets=remote_sockets) for _ in range(8)]
+
+        async def create(store, i):
+            try:
+                return await store.add(make_user("alice", f"alice{i}@example.com"))
+            except DuplicateUserError:
+                return None
+
+        async def scenario():
+            created = await asyncio.gather(
+                *(create(store, i) for i, store in enumerate(workers))
+            )
+            return [user for user in created if user is not None], workers[0]
+
+        winners, store = asyncio.run(scenario())
+        assert len(winners) == 1
+        assert asyncio.run(store.count()) == 1
+        assert asyncio.run(store.username_owner("alice")) == winners[0].id
+
+    def test_atomic_batch_rejected(self, remote_sockets, client, monkeypatch):
+        monkeypatch.setattr(main, "store", create_store(sockets=remote_sockets))
+        response = client.post(
+            "/users/batch",
+            json={
+                "atomic": True,
+                "operations": [
+                    {
+                        "op": "create",
+                        "user": {
+                            "username": "alice",
+                            "email": "alice@example.com",
+                            "password": "securepassword123",
+                        },
+                    }
+                ],
+            },
+        )
+        assert response.status_code == 400
+        assert "remote shards" in response.json()["detail"]
+        assert asyncio.run(main.store.count()) == 0
+
+    def test_unreachable_shard_is_not_ready(self, tmp_path):
+        store = create_store(sockets=[str(tmp_path / "missing.sock")])
+        assert asyncio.run(store.ping()) is False
+
+    def test_hung_shard_does_not_block_event_loop(self, hung_socket):
+        shard = RemoteShard(hung_socket, timeout=0.3)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def scenario():
+            task = asyncio.create_task(ticker())
+            alive = await shard.ping()
+            task.cancel()
+            return alive
+
+        assert asyncio.run(scenario()) is False
+        assert ticks >= 10
+
+    def test_readiness_check_times_out(self, hung_socket):
+        store = create_store(sockets=[hung_socket])
+        monitor = LoadMonitor(max_in_flight=10, max_loop_lag_ms=100, check_timeout=0.1)
+        monitor.add_check("store", store.ping)
+
+        started = time.monotonic()
+        assert asyncio.run(monitor.run_checks()) == {"store": False}
+        assert time.monotonic() - started < 1
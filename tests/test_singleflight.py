@@ -0,0 +1,180 @@
+import asyncio
+import json
+
+import pytest
+
+from src import main
+from src.main import reads
+from src.models import UserBase, UserCreate
+from src.singleflight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    reads.reset_stats()
+    yield
+    reads.reset_stats()
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"payload"
+
+        async def scenario():
+            return await asyncio.gather(*[flight.do("k", fetch) for _ in range(50)])
+
+        results = asyncio.run(scenario())
+        assert results == [b"payload"] * 50
+        assert len(calls) == 1
+        stats = flight.stats()
+        assert stats["executions"] == 1
+        assert stats["shared"] == 49
+        assert stats["coalescing_ratio"] == 0.98
+        assert stats["in_flight"] == 0
+
+    def test_distinct_keys_do_not_coalesce(self):
+        flight = SingleFlight()
+
+        async def scenario():
+            async def fetch(value):
+                await asyncio.sleep(0)
+                return value
+
+            return await asyncio.gather(
+                flight.do("a", lambda: fetch(1)), flight.do("b", lambda: fetch(2))
+            )
+
+        assert asyncio.run(scenario()) == [1, 2]
+        assert flight.executions == 2
+
+    def test_exception_propagates_to_waiters(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("backend down")
+
+        async def scenario():
+            return await asyncio.gather(
+                *[flight.do("k", fail) for _ in range(3)], return_exceptions=True
+            )
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.executions == 1
+
+    def test_sequential_calls_execute_again(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            return 1
+
+        async def scenario():
+            await flight.do("k", fetch)
+            await flight.do("k", fetch)
+
+        asyncio.run(scenario())
+        assert flight.executions == 2
+
+    def test_forget_detaches_in_flight_call(self):
+        flight = SingleFlight()
+        versions = iter(["stale", "fresh"])
+
+        async def fetch():
+            value = next(versions)
+            await asyncio.sleep(0.01)
+            return value
+
+        async def scenario():
+            first = asyncio.create_task(flight.do("k", fetch))
+            await asyncio.sleep(0)
+            flight.forget("k")
+            second = asyncio.create_task(flight.do("k", fetch))
+            await asyncio.sleep(0)
+            third = flight.do("k", fetch)
+            return await asyncio.gather(first, second, third)
+
+        assert asyncio.run(scenario()) == ["stale", "fresh", "fresh"]
+        assert flight.executions == 2
+        assert flight.keys() == []
+
+    def test_forget_unknown_key(self):
+        flight = SingleFlight()
+        flight.forget("missing")
+        assert flight.keys() == []
+
+
+class TestCoalescedEndpoints:
+    def test_get_user_serialized_response(self, client):
+        created = client.post(
+            "/users",
+            json={
+                "username": "testuser",
+                "email": "test@example.com",
+                "password": "securepassword123",
+            },
+        ).json()
+
+        response = client.get(f"/users/{created['id']}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == created
+
+    def test_stats_endpoint(self, client):
+        client.get("/users")
+        client.get("/users/1")
+
+        stats = client.get("/admin/singleflight").json()
+        assert stats["requests"] == 2
+        assert stats["executions"] == 2
+        assert stats["coalescing_ratio"] == 0.0
+
+    def test_write_does_not_join_stale_read(self, monkeypatch):
+        fetch_user = main._fetch_user
+        fetch_users = main._fetch_users
+        gate = asyncio.Event()
+
+        async def slow_user(user_id):
+            body = await fetch_user(user_id)
+            await gate.wait()
+            return body
+
+        async def slow_users(skip, limit):
+            body = await fetch_users(skip, limit)
+            await gate.wait()
+            return body
+
+        async def scenario():
+            created = await main.create_user(
+                UserCreate(
+                    username="before",
+                    email="before@example.com",
+                    password="securepassword123",
+                )
+            )
+            monkeypatch.setattr(main, "_fetch_user", slow_user)
+            monkeypatch.setattr(main, "_fetch_users", slow_users)
+            stale_user = asyncio.create_task(main.get_user(created.id))
+            stale_list = asyncio.create_task(main.list_users())
+            await asyncio.sleep(0)
+
+            await main.update_user(
+                created.id, UserBase(username="after", email="after@example.com")
+            )
+            monkeypatch.setattr(main, "_fetch_user", fetch_user)
+            monkeypatch.setattr(main, "_fetch_users", fetch_users)
+            fresh_user = await main.get_user(created.id)
+            fresh_list = await main.list_users()
+            gate.set()
+            await asyncio.gather(stale_user, stale_list)
+            return json.loads(fresh_user.body), json.loads(fresh_list.body)
+
+        user, users = asyncio.run(scenario())
+        assert user["username"] == "after"
+        assert [u["username"] for u in users] == ["after"]
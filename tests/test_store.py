@@ -0,0 +1,93 @@
+import pytest
+
+from src.models import User, UserBase
+from src.store import InMemoryUserStore
+
+
+def make_user(username, email="user@example.com"):
+    return UserBase(username=username, email=email)
+
+
+class TestInMemoryUserStore:
+    def test_add_assigns_sequential_ids(self):
+        store = InMemoryUserStore()
+        first = store.add(make_user("alice", "alice@example.com"))
+        second = store.add(make_user("bob", "bob@example.com"))
+        assert (first.id, second.id) == (1, 2)
+        assert len(store) == 2
+
+    def test_allocate_id_reserves_strided_ids(self):
+        store = InMemoryUserStore(id_stride=4, id_offset=1)
+        assert [store.allocate_id() for _ in range(2)] == [5, 9]
+        assert store.add(make_user("alice")).id == 13
+
+    def test_email_index_is_case_insensitive(self):
+        store = InMemoryUserStore()
+        user = store.add(make_user("alice", "Alice@example.com"))
+        assert store.email_taken("alice@EXAMPLE.com")
+        assert not store.email_taken("alice@example.com", exclude_id=user.id)
+
+    def test_update_reindexes(self):
+        store = InMemoryUserStore()
+        user = store.add(make_user("alice", "alice@example.com"))
+        store.update(user.id, make_user("alicia", "alicia@example.com"))
+        assert not store.username_taken("alice")
+        assert not store.email_taken("alice@example.com")
+        assert store.username_taken("alicia")
+        assert store.email_taken("alicia@example.com")
+
+    def test_insert_refuses_existing_id(self):
+        store = InMemoryUserStore()
+        user = store.add(make_user("alice"))
+        duplicate = User(**user.model_dump(exclude={"username"}), username="zed")
+        with pytest.raises(ValueError):
+            store.insert(duplicate)
+        assert store.get(user.id).username == "alice"
+        assert not store.username_taken("zed")
+
+    def test_delete_unindexes(self):
+        store = InMemoryUserStore()
+        user = store.add(make_user("alice"))
+        assert store.delete(user.id)
+        assert not store.delete(user.id)
+        assert not store.username_taken("alice")
+        assert store.get(user.id) is None
+
+    def test_list_pagination_preserves_insertion_order(self):
+        store = InMemoryUserStore()
+        for i in range(5):
+            store.add(make_user(f"user{i}", f"user{i}@example.com"))
+        store.delete(2)
+        assert [u.username for u in store.list(1, 2)] == ["user2", "user3"]
+
+    def test_transaction_rolls_back_on_error(self):
+        store = InMemoryUserStore()
+        for i in range(3):
+            store.add(make_user(f"user{i}", f"user{i}@example.com"))
+
+        try:
+            with store.transaction():
+                store.delete(2)
+                store.update(1, make_user("renamed", "renamed@example.com"))
+                store.add(make_user("new", "new@example.com"))
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+
+        assert [u.username for u in store.list()] == ["user0", "user1", "user2"]
+        assert store.username_taken("user0")
+        assert not store.username_taken("renamed")
+        assert not store.email_taken("new@example.com")
+        assert store.next_id == 4
+
+    def test_swapped_usernames_keep_index_consistent(self):
+        store = InMemoryUserStore()
+        store.add(make_user("alice", "alice@example.com"))
+        store.add(make_user("bob", "bob@example.com"))
+
+        store.update(1, make_user("bob", "bob@example.com"))
+        store.update(2, make_user("alice", "alice@example.com"))
+
+        assert store.username_owner("bob") == 1
+        assert store.username_owner("alice") == 2
+        assert store.email_owner("BOB@example.com") == 1